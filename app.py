@@ -18,3 +18,8 @@ app = (
         # .add_middleware(AuthenticationMiddleware)
         # .add_middleware(HandleErrorMiddleware)
 )
+
+
+@app.raw('GET', '/health')
+async def health(scope, protocol):
+    protocol.response_str(200, [('content-type', 'text/plain')], 'ok')
@@ -0,0 +1,139 @@
+"""
+Microbenchmark dos codecs JSON com payloads dos modelos reais.
+
+Mede throughput e latência (p50/p99) de `dumps` (dicts já serializados
+pelos modelos e instâncias dos modelos via hook `default`) e `loads`
+para cada codec disponível em `src.codec`.
+
+    uv run python -m benchmarks.bench_codec --sizes 1 100 1000 --output bench.json
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.codec import CODECS, JSONCodec, orjson
+from src.domain.models import Consulta, Doenca, Exame, Medicamento
+from src.domain.models._base import DomainModel
+
+
+def make_models(size: int, seed: int) -> List[DomainModel]:
+    rng = random.Random(seed)
+    inicio = datetime(2024, 1, 1, 8, 0)
+    models: List[DomainModel] = []
+    for i in range(size):
+        horario = inicio + timedelta(hours=rng.randrange(24 * 365))
+        kind = i % 4
+        if kind == 0:
+            models.append(Consulta(
+                horario, 'Consulta de rotina', f'Dr. Médico {i}', 'Clínica geral',
+                'Hospital Central', 'Paciente em jejum', i, i, _id=i + 1, marcado=True
+            ))
+        elif kind == 1:
+            models.append(Exame(
+                'Hemograma', horario.date(), bool(i % 2), 'Normal', 'Lab São José',
+                i, i, _id=i + 1
+            ))
+        elif kind == 2:
+            models.append(Medicamento(
+                'Dipirona', '500mg', '8/8h', horario.date(), 'oral',
+                horario.date() + timedelta(days=7), i, i, _id=i + 1
+            ))
+        else:
+            models.append(Doenca(
+                'Hipertensão', 'Pressão arterial elevada', 'I10', i, _id=i + 1
+            ))
+
+    return models
+
+
+def summarize(codec: str, size: int, case: str, payload_bytes: int, timings: List[int]) -> Dict[str, Any]:
+    timings.sort()
+    total = sum(timings)
+    return {
+        'codec': codec,
+        'items': size,
+        'case': case,
+        'bytes': payload_bytes,
+        'ops': len(timings),
+        'ops_per_sec': round(len(timings) / (total / 1e9), 1) if total else None,
+        'mean_ns': round(total / len(timings), 1),
+        'p50_ns': timings[len(timings) // 2],
+        'p99_ns': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def bench(func: Callable[[Any], Any], value: Any, samples: int) -> List[int]:
+    timings = []
+    clock = time.perf_counter_ns
+    for _ in range(samples):
+        start = clock()
+        func(value)
+        timings.append(clock() - start)
+
+    return timings
+
+
+def run(
+    sizes: Sequence[int],
+    codecs: Sequence[str],
+    samples: int,
+    seed: int
+) -> List[Dict[str, Any]]:
+
+    results = []
+    for size in sizes:
+        models = make_models(size, seed)
+        dicts = [model.to_dict() for model in models]
+        for name in codecs:
+            codec: JSONCodec = CODECS[name]()
+            encoded = codec.dumps(dicts)
+            cases = (
+                ('dumps', codec.dumps, dicts),
+                ('dumps_models', codec.dumps, models),
+                ('loads', codec.loads, encoded),
+            )
+            for case, func, value in cases:
+                timings = bench(func, value, samples)
+                results.append(summarize(name, size, case, len(encoded), timings))
+
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    available = [name for name in CODECS if name != 'orjson' or orjson is not None]
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--codecs', nargs='+', default=available, choices=available)
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.codecs, args.samples, args.seed)
+    report = {
+        'benchmark': 'codec',
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'samples': args.samples,
+        'seed': args.seed,
+        'results': results,
+    }
+
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(content)
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
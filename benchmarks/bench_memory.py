@@ -0,0 +1,193 @@
+"""
+Alocação de memória por request com tracemalloc.
+
+Roda uma carga contínua de GETs e POSTs (body JSON) por
+`App.dispatch_request` e mede, por request, o pico de memória transitória
+e o que fica retido, comparando os `Request`/`Response`/`DotDict` atuais
+(com `__slots__`) com réplicas das versões baseadas em `__dict__`.
+
+    uv run python -m benchmarks.bench_memory --requests 20000 --output bench.json
+"""
+
+import argparse
+import asyncio
+from contextlib import ExitStack, redirect_stdout
+from dataclasses import dataclass
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from unittest.mock import patch
+
+from src import App
+from src.models import DotDict, Request, Response
+from src.routers._base import APIRouter
+from src.utils import BodyReader, get, make_response, post
+
+
+@dataclass
+class LegacyRequest:
+    query: Mapping[str, Any]
+    get_body: Callable
+    headers: Mapping[str, str]
+
+
+@dataclass
+class LegacyResponse:
+    status: int
+    body: Any
+    headers: Dict[str, str]
+
+
+class LegacyDotDict(dict):
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    'slots': {},
+    'legacy': {
+        'src.Request': LegacyRequest,
+        'src.utils.Response': LegacyResponse,
+        'src.utils.DotDict': LegacyDotDict,
+    },
+}
+
+BODY = json.dumps({
+    'horario': '2024-05-01T09:30:00',
+    'motivo': 'Consulta de rotina',
+    'medico': 'Dr. Ana',
+    'paciente_id': 1,
+}).encode()
+
+
+class MemoryController:
+
+    url_prefix = '/mem/'
+
+    @get('/<id:int>')
+    async def detalhe(self, request, id: int):
+        return make_response({'id': id, 'nome': f'item {id}'})
+
+    @post('/')
+    async def criar(self, request):
+        body = await request.get_body()
+        return make_response({'motivo': body.motivo, 'medico': body.medico}, 201)
+
+
+def object_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if hasattr(value, '__dict__'):
+        size += sys.getsizeof(value.__dict__)
+    return size
+
+
+def object_sizes() -> List[Dict[str, Any]]:
+    pairs: Sequence[Tuple[str, Any, Any]] = (
+        ('Request', Request({}, len, {}), LegacyRequest({}, len, {})),
+        ('Response', Response(200, None, {}), LegacyResponse(200, None, {})),
+        ('DotDict', DotDict(a=1, b=2), LegacyDotDict(a=1, b=2)),
+    )
+    return [
+        {'object': name, 'slots_bytes': object_size(new), 'legacy_bytes': object_size(old)}
+        for name, new, old in pairs
+    ]
+
+
+def make_get_body() -> BodyReader:
+    async def receive():
+        return {'type': 'http.request', 'body': BODY, 'more_body': False}
+
+    return BodyReader(receive, rsgi=False, content_length=len(BODY))
+
+
+async def dispatch(app: App, method: str, path: str) -> None:
+    get_body = make_get_body() if method == 'POST' else None
+    await app.dispatch_request('', path, method, get_body, {})
+
+
+async def measure(app: App, requests: int, warmup: int) -> Dict[str, Any]:
+    workload = [
+        ('POST', '/mem/') if i % 2 else ('GET', f'/mem/{i}')
+        for i in range(requests)
+    ]
+    for method, path in workload[:warmup]:
+        await dispatch(app, method, path)
+
+    gc.collect()
+    tracemalloc.start()
+    start_current, _ = tracemalloc.get_traced_memory()
+    peaks = []
+    started = time.perf_counter_ns()
+    for method, path in workload:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await dispatch(app, method, path)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    elapsed = time.perf_counter_ns() - started
+    gc.collect()
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peaks.sort()
+    return {
+        'requests': requests,
+        'mean_peak_bytes': round(sum(peaks) / len(peaks), 1),
+        'p50_peak_bytes': peaks[len(peaks) // 2],
+        'p99_peak_bytes': peaks[min(len(peaks) - 1, int(len(peaks) * 0.99))],
+        'retained_bytes': end_current - start_current,
+        'mean_ns': round(elapsed / requests, 1),
+    }
+
+
+def run(requests: int, warmup: int) -> List[Dict[str, Any]]:
+    results = []
+    for variant, patches in VARIANTS.items():
+        with redirect_stdout(sys.stderr):
+            app = App(mode='test', routers=[APIRouter(MemoryController())])
+        with ExitStack() as stack:
+            for target, value in patches.items():
+                stack.enter_context(patch(target, value))
+            result = asyncio.run(measure(app, requests, warmup))
+        results.append(dict(variant=variant, **result))
+
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    report = {
+        'benchmark': 'memory',
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'objects': object_sizes(),
+        'results': run(args.requests, args.warmup),
+    }
+
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(content)
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
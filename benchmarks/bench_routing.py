@@ -0,0 +1,240 @@
+"""
+Microbenchmark de roteamento com tabelas de rotas sintéticas.
+
+Mede throughput e latência (p50/p99) de hits, misses e 405 através de
+`BaseRouter.match_route` e `App.dispatch_request`, para cada engine de
+rotas, usando a `Route` standalone de `rsgi.py` como baseline.
+
+    uv run python -m benchmarks.bench_routing --sizes 10 100 1000 --output bench.json
+"""
+
+import argparse
+import asyncio
+from contextlib import redirect_stdout
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src import App
+from src.exceptions.http import HTTPException
+from src.routers._base import APIRouter, BaseRouter
+from src.routers._matcher import ENGINES
+from src.utils import get, make_response
+
+
+ROUTES_PER_ROUTER = 10
+
+# (sufixo do template, path de exemplo) para cada tipo de placeholder suportado
+SHAPES: Tuple[Tuple[str, str], ...] = (
+    ('/', '/'),
+    ('/<id:int>', '/42'),
+    ('/<nome:str>/detalhe', '/antonio/detalhe'),
+    ('/<valor:float>', '/3.14'),
+    ('/<itens:list>/todos', '/a,b,c/todos'),
+    ('/<ids:list[int]>/lote', '/1,2,3/lote'),
+    ('/<valores:list[float]>/media', '/1.5,2.5/media'),
+    ('/<nomes:list[str]>/nomes', '/ana,bia/nomes'),
+    ('/<filtros:dict>/busca', '/a=1,b=2/busca'),
+)
+
+
+def make_endpoint(pattern: str) -> Callable:
+    async def endpoint(self, request, **kwargs):
+        return make_response(kwargs)
+
+    return get(pattern)(endpoint)
+
+
+def make_controller(prefix: str, start: int, count: int) -> Tuple[Any, List[str]]:
+    attrs: Dict[str, Any] = {'url_prefix': prefix}
+    paths = []
+    for i in range(start, start + count):
+        template, sample = SHAPES[i % len(SHAPES)]
+        attrs[f'e{i}'] = make_endpoint(f'/e{i}{template}')
+        paths.append(f'{prefix}e{i}{sample}')
+
+    controller_class = type(f'SyntheticController{start}', (), attrs)
+    return controller_class(), paths
+
+
+def make_routers(size: int, per_router: int) -> Tuple[List[BaseRouter], List[str]]:
+    routers: List[BaseRouter] = []
+    paths: List[str] = []
+    for start in range(0, size, per_router):
+        count = min(per_router, size - start)
+        controller, controller_paths = make_controller(f'/r{start // per_router}/', start, count)
+        routers.append(APIRouter(controller))
+        paths.extend(controller_paths)
+
+    return routers, paths
+
+
+def make_workloads(paths: List[str], samples: int, seed: int) -> Dict[str, List[Tuple[str, str]]]:
+    rng = random.Random(seed)
+    hits = [rng.choice(paths) for _ in range(samples)]
+    return {
+        'hit': [('GET', path) for path in hits],
+        'miss': [('GET', f'/nao-existe{path}') for path in hits],
+        '405': [('DELETE', path) for path in hits],
+    }
+
+
+def summarize(
+    target: str,
+    engine: str,
+    size: int,
+    case: str,
+    timings: List[int]
+) -> Dict[str, Any]:
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'target': target,
+        'engine': engine,
+        'routes': size,
+        'case': case,
+        'ops': len(timings),
+        'ops_per_sec': round(len(timings) / (total / 1e9), 1) if total else None,
+        'mean_ns': round(total / len(timings), 1),
+        'p50_ns': timings[len(timings) // 2],
+        'p99_ns': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def check_hits(resolve: Callable[[str, str], Tuple[Any, Any]], workload: Sequence[Tuple[str, str]]) -> None:
+    """Garante que os paths de "hit" resolvem, para não medir misses por engano."""
+    for method, path in workload:
+        handler, _ = resolve(method, path)
+        assert handler is not None, f'Rota de hit não resolvida: {method} {path}'
+
+
+def bench_router(router: BaseRouter, workload: Sequence[Tuple[str, str]]) -> List[int]:
+    timings = []
+    clock = time.perf_counter_ns
+    for method, path in workload:
+        start = clock()
+        try:
+            router.match_route(method, path)
+        except HTTPException:
+            pass
+        timings.append(clock() - start)
+
+    return timings
+
+
+async def bench_app(app: App, workload: Sequence[Tuple[str, str]]) -> List[int]:
+    async def get_body(validator=None):
+        return None
+
+    timings = []
+    clock = time.perf_counter_ns
+    for method, path in workload:
+        start = clock()
+        try:
+            await app.dispatch_request('', path, method, get_body, {})
+        except HTTPException:
+            pass
+        timings.append(clock() - start)
+
+    return timings
+
+
+def bench_rsgi_baseline(size: int, paths: List[str], workload: Sequence[Tuple[str, str]]) -> List[int]:
+    from rsgi import Route as RSGIRoute
+
+    async def endpoint(scope, **kwargs):
+        return None
+
+    routes = []
+    for i in range(size):
+        template, _ = SHAPES[i % len(SHAPES)]
+        routes.append(RSGIRoute(f'/r{i // ROUTES_PER_ROUTER}/e{i}{template}', endpoint))
+
+    timings = []
+    clock = time.perf_counter_ns
+    for _, path in workload:
+        start = clock()
+        for route in routes:
+            if route.match(path) is not None:
+                break
+        timings.append(clock() - start)
+
+    return timings
+
+
+def run(
+    sizes: Sequence[int],
+    engines: Sequence[str],
+    samples: int,
+    seed: int,
+    baseline: bool
+) -> List[Dict[str, Any]]:
+
+    results = []
+    for size in sizes:
+        for engine in engines:
+            # Um único router com todas as rotas
+            routers, paths = make_routers(size, size)
+            router = routers[0]
+            router.use_engine(engine)
+            workloads = make_workloads(paths, samples, seed)
+            check_hits(router.match_route, workloads['hit'])
+            for case, workload in workloads.items():
+                timings = bench_router(router, workload)
+                results.append(summarize('router.match_route', engine, size, case, timings))
+
+            # App com vários routers, como a aplicação real
+            routers, paths = make_routers(size, ROUTES_PER_ROUTER)
+            with redirect_stdout(sys.stderr):
+                app = App(mode='test', router_engine=engine, routers=routers)
+            workloads = make_workloads(paths, samples, seed)
+            check_hits(app.resolve_route, workloads['hit'])
+            for case, workload in workloads.items():
+                timings = asyncio.run(bench_app(app, workload))
+                results.append(summarize('app.dispatch_request', engine, size, case, timings))
+
+        if baseline:
+            _, paths = make_routers(size, ROUTES_PER_ROUTER)
+            workloads = make_workloads(paths, samples, seed)
+            for case in ('hit', 'miss'):
+                timings = bench_rsgi_baseline(size, paths, workloads[case])
+                results.append(summarize('rsgi.Route', 'linear', size, case, timings))
+
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-baseline', action='store_true')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: stdout)')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.engines, args.samples, args.seed, not args.no_baseline)
+    report = {
+        'benchmark': 'routing',
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'samples': args.samples,
+        'seed': args.seed,
+        'results': results,
+    }
+
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(content)
+    else:
+        print(content)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from abc import ABC
+import asyncio
 from asyncio import iscoroutinefunction
 from contextlib import suppress
 import inspect
 import logging
-import json
+import os
 from src import _types as t
 from typing import TYPE_CHECKING
 
@@ -14,8 +15,9 @@ try:
 except:
     from src.config import settings
 
-from typing import Any, Callable, Coroutine, Dict, List, Type, Union, Optional
-from src.models import DotDict, Request
+from typing import Any, Callable, Coroutine, Dict, List, Mapping, Sequence, Set, Tuple, Type, Union, Optional
+from src.codec import DEFAULT_CODEC, JSONCodec, get_codec
+from src.models import DotDict, FileResponse, Headers, QueryParams, Request, StreamingResponse
 from src.routers import (
     ConsultaRouter,
     DoencaRouter,
@@ -26,9 +28,22 @@ from src.routers import (
     TesteRouter,
     AuthRouter
 )
-
-from src.exceptions.http import NotFoundError, UnprocessableEntityError
-from src.utils import ParamsValidator, ProtocolParser, assure_tuples_of_str, parse_query_string, is_rsgi_app, headers_to_response
+from src.routers._base import BaseRouter, RawRouter
+from src.routers._cache import RouteCache, make_entry, resolve_entry
+from src.routers._matcher import StaticRoutes
+from src.routers._mount import Mount, MountTable
+from src.routers._table import RouteTable
+
+from src.exceptions.http import MethodNotAllowedError, NotFoundError, UnprocessableEntityError
+from src.utils import (
+    DEFAULT_MAX_BODY_SIZE,
+    NO_BODY_STATUS,
+    ParamsValidator,
+    ProtocolParser,
+    is_rsgi_app,
+    response_headers_bytes,
+    response_headers_str
+)
 from src.models import Response
 
 
@@ -40,11 +55,33 @@ if TYPE_CHECKING:
 logging.basicConfig(level=logging.INFO)
 
 
+# Referências fortes às tasks de hooks agendadas em um loop já rodando
+_hook_tasks: Set[asyncio.Task] = set()
+
+
+def run_hook_on_loop(loop: asyncio.AbstractEventLoop, coroutine: Coroutine) -> Any:
+    """
+    Roda `coroutine` até o fim em `loop`; se o loop já está rodando (modos
+    embutidos do granian), `run_until_complete` levantaria RuntimeError e
+    a coroutine é agendada como task, que é devolvida.
+    """
+
+    if not loop.is_running():
+        return loop.run_until_complete(coroutine)
+
+    task = loop.create_task(coroutine)
+    _hook_tasks.add(task)
+    task.add_done_callback(_hook_tasks.discard)
+    return task
+
+
 class BaseApp(ABC):
 
     last: bool
     app: BaseApp
-    parent: Optional[BaseApp]
+    parent: Optional[BaseApp] = None
+    raw_router: Optional[RawRouter] = None
+    codec: JSONCodec = DEFAULT_CODEC
 
     def __init__(self, *args) -> None:
         raise NotImplementedError
@@ -52,6 +89,12 @@ class BaseApp(ABC):
     def exec(self, *args):
         raise NotImplementedError
 
+    async def exec_rsgi(self, scope: Any, protocol: Any):
+        await self.exec(scope, protocol)
+
+    async def exec_asgi(self, scope: t.Scope, receive: t.Receive, send: t.Send):
+        await self.exec(scope, receive, send)
+
     def __str__(self):
         return f'{{ self.last: {self.last}, name: {self.__class__.__name__} }}'
 
@@ -72,64 +115,132 @@ class BaseApp(ABC):
         scope: Any,
         send: Any,
         status: int,
-        body: str,
+        body: Union[str, bytes],
         headers: dict
     ):
 
-        await self._send_response(scope, send, status, body, headers)
+        if is_rsgi_app(scope):
+            await self.send_response_rsgi(send, status, body, headers)
+        else:
+            await self.send_response_asgi(send, status, body, headers)
 
-    async def _send_response(
+    async def send_response_rsgi(
         self,
-        scope: Any,
-        send: Any,
+        protocol: Any,
         status: int,
-        body: str,
+        body: Union[str, bytes],
         headers: dict
     ):
 
-        if is_rsgi_app(scope):
-            response_headers = {}
-            response_headers.update(headers)
-            headers_response = headers_to_response(response_headers, mode='str')
-            send.response_str(
-                status=status,
-                headers=assure_tuples_of_str(headers_response),
-                body=body
-            )
+        if status in NO_BODY_STATUS:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
 
-        else:
-            response_headers = {}
-            response_headers.update(headers)
-            headers_response = headers_to_response(
-                response_headers, mode='bytes'
-            )
+        protocol.response_bytes(
+            status=status,
+            headers=response_headers_str(headers, status, len(body)),
+            body=body
+        )
 
-            print(f'Self: {self}')
+    async def send_response_asgi(
+        self,
+        send: t.Send,
+        status: int,
+        body: Union[str, bytes],
+        headers: dict
+    ):
 
-            try:
-                params = {
-                    "type": "http.response.start",
-                    "status": status,
-                    "headers": headers_response,
-                }
-                print(f"params: {params}")
-                await send(params)
-            except Exception:
-                pass
-            
-            more_body = True
-            if self.last:
-                more_body = False
-
-            params = {
-                "type": "http.response.body",
-                "body": body.encode('utf-8'),
-                'more_body': more_body
-            }
-            await send(params)
-            print(f"params: {params}")
+        if status in NO_BODY_STATUS:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": response_headers_bytes(headers, status, len(body)),
+            })
+        except Exception:
+            pass
+
+        await send({
+            "type": "http.response.body",
+            "body": body,
+            'more_body': False
+        })
+
+    async def send_stream_rsgi(self, protocol: Any, response: StreamingResponse):
+        transport = protocol.response_stream(
+            status=response.status,
+            headers=response_headers_str(response.headers, response.status)
+        )
+        chunks = response.chunks()
+        try:
+            async for chunk in chunks:
+                # send_bytes só retorna quando o transporte aceita mais dados
+                await transport.send_bytes(chunk)
+        finally:
+            await chunks.aclose()
+            await response.aclose()
+
+    async def send_stream_asgi(self, send: t.Send, response: StreamingResponse):
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response_headers_bytes(response.headers, response.status),
+        })
+        chunks = response.chunks()
+        try:
+            async for chunk in chunks:
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True
+                })
+        finally:
+            await chunks.aclose()
+            await response.aclose()
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send_file_rsgi(self, protocol: Any, response: FileResponse):
+        protocol.response_file(
+            status=response.status,
+            headers=response_headers_str(response.headers, response.status),
+            file=response.body
+        )
+
+    async def send_file_asgi(self, scope: t.Scope, send: t.Send, response: FileResponse):
+        extensions = scope.get('extensions') or {}
+        await send({
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response_headers_bytes(response.headers, response.status),
+        })
+
+        if 'http.response.pathsend' in extensions:
+            await send({
+                "type": "http.response.pathsend",
+                "path": os.path.abspath(response.body)
+            })
             return
-    
+
+        with open(response.body, 'rb') as f:
+            if 'http.response.zerocopy' in extensions:
+                await send({"type": "http.response.zerocopy", "file": f, "more_body": False})
+                return
+
+            loop = asyncio.get_running_loop()
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, response.chunk_size)
+                if not chunk:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
     def add_middleware(self, middleware: Type[BaseApp], params=None) -> BaseApp:
 
         self.last = True
@@ -140,125 +251,356 @@ class BaseApp(ABC):
 
         self.app.last = False
         self.app.parent = self
+        self.raw_router = self.app.raw_router
 
         return self
+
+    def add_raw_route(self, method: str, path: str, handler: Callable) -> None:
+        if self.raw_router is None:
+            raise RuntimeError('Rotas raw exigem um App na base da pilha')
+        self.raw_router.add_route(method, path, handler)
+
+    def raw(self, method: str, path: str) -> Callable:
+        """
+        Registra um handler raw RSGI: recebe `(scope, protocol, **args)` e
+        responde direto pelo protocol, antes de middlewares e do App.
+        Requisições ASGI seguem sempre o pipeline normal.
+        """
+
+        def decorator(handler: Callable) -> Callable:
+            self.add_raw_route(method, path, handler)
+            return handler
+
+        return decorator
+
+    async def dispatch_raw(self, scope: Any, protocol: Any) -> bool:
+        if self.raw_router is None or self.parent is not None:
+            return False
+
+        handler, args = self.raw_router.match_raw(scope.method, scope.path)
+        if handler is None:
+            return False
+
+        result = handler(scope, protocol, **args)
+        if inspect.isawaitable(result):
+            await result
+        return True
     
+    def root_app(self) -> BaseApp:
+        app = self
+        while getattr(app, 'app', None) is not None:
+            app = app.app
+        return app
+
+    def on_startup(self, handler: Callable) -> Callable:
+        """Registra um hook (síncrono ou async) executado antes da primeira request."""
+        self.root_app().startup_handlers.append(handler)  # type: ignore
+        return handler
+
+    def on_shutdown(self, handler: Callable) -> Callable:
+        """Registra um hook (síncrono ou async) executado no desligamento."""
+        self.root_app().shutdown_handlers.append(handler)  # type: ignore
+        return handler
+
+    async def startup(self):
+        await self.root_app().startup()
+
+    async def shutdown(self):
+        await self.root_app().shutdown()
+
+    async def lifespan(self, receive: t.Receive, send: t.Send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as error:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(error)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await self.shutdown()
+                except Exception as error:
+                    await send({'type': 'lifespan.shutdown.failed', 'message': str(error)})
+                    return
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def __rsgi_init__(self, loop):
+        # O granian chama antes de iniciar o loop do worker
+        return run_hook_on_loop(loop, self.startup())
+
+    def __rsgi_del__(self, loop):
+        return run_hook_on_loop(loop, self.shutdown())
+
     async def __call__(self, scope: t.Scope, receive: t.Receive, send: t.Send):
         if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
             return
 
-        try:
-            await self.exec(scope, receive, send)
-        except:
-            # traceback.print_exc()
-            raise
+        await self.exec_asgi(scope, receive, send)
 
     async def __rsgi__(self, scope, protocol):
-        await self.exec(scope, protocol)
+        if self.raw_router is not None and self.raw_router.routes:
+            if await self.dispatch_raw(scope, protocol):
+                return
+        await self.exec_rsgi(scope, protocol)
 
 
 class App(BaseApp):
-    def __init__(self, mode: str = 'dev'):
+    def __init__(
+        self,
+        mode: str = 'dev',
+        router_engine: str = 'trie',
+        route_cache_size: int = 0,
+        route_table: Optional[str] = None,
+        routers: Optional[Sequence[BaseRouter]] = None,
+        max_body_size: Optional[int] = None,
+        codec: Union[None, str, JSONCodec] = None
+    ):
 
         print(f'Running in mode: {mode}')
         self.last = True
         self.parent = None
+        self.started = False
+        self.startup_handlers: List[Callable] = []
+        self.shutdown_handlers: List[Callable] = []
         self.mode = mode
         settings.set_mode(mode)
+        self.max_body_size = max_body_size or settings.get(
+            'max_body_size', DEFAULT_MAX_BODY_SIZE
+        )
+        self.codec = get_codec(codec or settings.get('json_codec'))
+
+        saved_routes = RouteTable.read(route_table) if route_table else None
+        if routers is None:
+            routers = self.default_routers(saved_routes)
+        self.routers = tuple(routers)
+
+        self.router_engine = router_engine
+        self.static_routes = StaticRoutes()
+        for router in self.routers:
+            router.use_engine(router_engine)
+            self.static_routes.update(router.static_routes)
+
+        self.mounts: Tuple[Mount, ...] = ()
+        self.mount_table = MountTable(self.routers)
+
+        self.routes = RouteTable.build(self.routers, router_engine)
+        self.routes.report()
+        if route_table:
+            self.routes.sync(route_table, saved_routes)
+
+        self.route_cache = (
+            RouteCache(route_cache_size) if route_cache_size > 0 else None
+        )
+        self.raw_router = RawRouter()
 
+    def default_routers(self, route_table: Optional[RouteTable] = None) -> Tuple[BaseRouter, ...]:
         from src.infra.database.sql import init_mappers
         from src.infra.database.sql import get_session_local
         # from src.infra.database.mongo import client
 
         SessionLocal = get_session_local()
         session = SessionLocal()
+        self.on_shutdown(session.close)
         # session = client
 
         init_mappers()
 
-        self.routers = (
-            ConsultaRouter(session),
-            DoencaRouter(session),
-            ExameRouter(session),
-            MedicamentoRouter(session),
-            # TarefaRouter(session),
-            # PacienteRouter(session),
-            TesteRouter(),
-            AuthRouter(session),
+        return (
+            ConsultaRouter(session, route_table),
+            DoencaRouter(session, route_table),
+            ExameRouter(session, route_table),
+            MedicamentoRouter(session, route_table),
+            # TarefaRouter(session, route_table),
+            # PacienteRouter(session, route_table),
+            TesteRouter(route_table),
+            AuthRouter(session, route_table),
         )
 
     async def __rsgi__(self, scope: 'GranianScope', protocol: 'RSGIHTTPProtocol'):
 
-        get_body = ProtocolParser.make_get_body_callback(scope, protocol)
+        if self.raw_router is not None and self.raw_router.routes:
+            if await self.dispatch_raw(scope, protocol):
+                return
+
+        get_body = ProtocolParser.make_get_body_callback(
+            scope, protocol, rsgi=True, max_body_size=self.max_body_size, codec=self.codec
+        )
         response = await self.dispatch_request(
             scope.query_string,
             scope.path,
             scope.method,
             get_body,  # type: ignore
-            dict(scope.headers.items())
+            Headers(scope.headers, rsgi=True)
         )
 
-        await self.send_response(
-            scope,
+        if isinstance(response, StreamingResponse):
+            await self.send_stream_rsgi(protocol, response)
+            return
+        if isinstance(response, FileResponse):
+            await self.send_file_rsgi(protocol, response)
+            return
+
+        await self.send_response_rsgi(
             protocol,
             response.status,
-            json.dumps(response.body),
+            self.encode_body(response),
             response.headers
         )
 
     async def __call__(self, scope: t.Scope, receive: t.Receive, send: t.Send):
 
         if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
             return
-        
-        get_body = ProtocolParser.make_get_body_callback(scope, receive)
+
+        get_body = ProtocolParser.make_get_body_callback(
+            scope, receive, rsgi=False, max_body_size=self.max_body_size, codec=self.codec
+        )
         response = await self.dispatch_request(
-            scope['query_string'].decode('utf-8'),
+            scope['query_string'],
             scope['path'],
             scope['method'],
-            get_body,   {  # type: ignore
-                key.decode('utf-8'): item.decode('utf-8')
-                for key, item in dict(scope['headers']).items()
-            }
+            get_body,  # type: ignore
+            Headers(scope['headers'])
         )
 
-        await self.send_response(
-            scope,
+        if isinstance(response, StreamingResponse):
+            await self.send_stream_asgi(send, response)
+            return
+        if isinstance(response, FileResponse):
+            await self.send_file_asgi(scope, send, response)
+            return
+
+        await self.send_response_asgi(
             send,
-            scope['status'],
-            json.dumps(response.body),
+            response.status,
+            self.encode_body(response),
             response.headers
         )
 
+    def encode_body(self, response: Response) -> bytes:
+        """Body pronto para envio: vazio em 204/304, bytes como estão, o resto pelo codec."""
+        if response.status in NO_BODY_STATUS:
+            return b''
+        if isinstance(response.body, bytes):
+            return response.body
+        return self.codec.dumps(response.body)
+
+    async def startup(self):
+        """
+        Prepara a aplicação antes do tráfego: compila matchers das rotas
+        e metadados dos validators, e então roda os hooks de `on_startup`.
+        """
+
+        if self.started:
+            return
+
+        for router in self.routers:
+            if router.matcher is None:
+                router.build_matcher()
+        ParamsValidator.compile_all()
+        for mount in self.mounts:
+            if hasattr(mount.app, 'startup'):
+                await mount.app.startup()
+
+        for handler in self.startup_handlers:
+            await self.run_hook(handler)
+        self.started = True
+
+    async def shutdown(self):
+        if not self.started:
+            return
+
+        # Ordem inversa do startup, como em uma pilha de recursos
+        for handler in reversed(self.shutdown_handlers):
+            await self.run_hook(handler)
+        for mount in self.mounts:
+            if hasattr(mount.app, 'shutdown'):
+                await mount.app.shutdown()
+        if self.route_cache is not None:
+            self.route_cache.clear()
+        self.started = False
+
+    @staticmethod
+    async def run_hook(handler: Callable):
+        result = handler()
+        if inspect.isawaitable(result):
+            await result
+
+    def mount(self, prefix: str, app: App) -> Mount:
+        """
+        Monta uma sub-aplicação sob `prefix`: requests cujo path começa com
+        o prefixo são resolvidas pelas rotas dela, sem o prefixo.
+        """
+
+        mount = Mount(prefix, app)
+        self.mounts += (mount,)
+        self.static_routes.update(mount.static_routes)
+        self.mount_table = MountTable(self.routers + self.mounts)
+        if self.route_cache is not None:
+            self.route_cache.clear()
+        return mount
+
+    @property
+    def cacheable(self) -> bool:
+        return self.mount_table.all_cacheable
+
+    def static_route_stats(self) -> Dict[str, int]:
+        return self.static_routes.stats()
+
+    def route_cache_stats(self) -> Optional[Dict[str, int]]:
+        return self.route_cache.stats() if self.route_cache else None
+
+    def resolve_route(self, method: str, path: str) -> Tuple[Callable, Dict[str, Any]]:
+        endpoint_handler = self.static_routes.get(method, path)
+        if endpoint_handler is not None:
+            return endpoint_handler, {}
+
+        # Só cacheia quando todos os candidatos do path são puros
+        if self.route_cache is None or not self.mount_table.cacheable(path):
+            return self.match_routers(method, path)
+
+        entry = self.route_cache.get(method, path)
+        if entry is None:
+            try:
+                endpoint_handler, path_args = self.match_routers(method, path)
+            except (NotFoundError, MethodNotAllowedError) as error:
+                self.route_cache.set(method, path, make_entry(None, None, error))
+                raise
+            entry = make_entry(endpoint_handler, path_args)
+            self.route_cache.set(method, path, entry)
+
+        return resolve_entry(entry)
+
+    def match_routers(self, method: str, path: str) -> Tuple[Callable, Dict[str, Any]]:
+        for router in self.mount_table.candidates(path):
+            endpoint_handler, path_args = router.match_dynamic(method, path)
+            if endpoint_handler is not None and path_args is not None:
+                return endpoint_handler, path_args
+
+        raise NotFoundError("Route not Found")
+
     async def dispatch_request(
         self,
-        query_string: str,
+        query_string: Union[str, bytes],
         path: str,
         method: str,
         get_body_callback: Callable[
             [Optional[Type[ParamsValidator]]],
             Coroutine[Any, Any, Optional[DotDict]]
         ],
-        headers: Dict[str, str],
+        headers: Mapping[str, str],
     ) -> Response:
 
-        query = parse_query_string(query_string)
-        endpoint_handler, path_args = None, None
-        for router in self.routers:
-            endpoint_handler, path_args = router.match_route(method, path)
-            if endpoint_handler is not None:
-                break
-
-        if endpoint_handler is None or path_args is None:
-            raise NotFoundError("Route not Found")
+        endpoint_handler, path_args = self.resolve_route(method, path)
 
         response: Response
-        request = Request(query, get_body_callback, headers)
-
-        for param_name, param_type in endpoint_handler.__annotations__.items():
-            for arg_name, arg_value in path_args.items():
-                if param_name == arg_name:
-                    path_args[arg_name] = param_type(arg_value)
+        request = Request(QueryParams(query_string), get_body_callback, headers)
 
         if iscoroutinefunction(endpoint_handler):
             response = await endpoint_handler(request, **path_args)
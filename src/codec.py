@@ -0,0 +1,177 @@
+from datetime import date, datetime
+import json
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator,
+    Optional, Type, Union
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
+
+
+class JSONCodec:
+    """
+    Interface dos codecs JSON da aplicação: `dumps` sempre devolve bytes
+    prontos para o transporte e `loads` aceita bytes ou str. Erros de
+    decodificação são `ValueError` em todas as implementações.
+    """
+
+    name: str
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}()'
+
+
+class StdlibCodec(JSONCodec):
+    """Codec da biblioteca padrão, com a mesma saída compacta do orjson."""
+
+    name = 'json'
+
+    def __init__(self) -> None:
+        self.encoder = json.JSONEncoder(
+            ensure_ascii=False,
+            separators=(',', ':'),
+            default=default
+        )
+
+    def dumps(self, value: Any) -> bytes:
+        return self.encoder.encode(value).encode('utf-8')
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec com orjson: serializa direto para bytes, datas e dicts nativamente."""
+
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError('orjson não está instalado')
+        self._dumps: Callable[..., bytes] = orjson.dumps
+        self._loads: Callable[[Any], Any] = orjson.loads
+
+    def dumps(self, value: Any) -> bytes:
+        return self._dumps(value, default=default)
+
+    def loads(self, data: Union[bytes, bytearray, str]) -> Any:
+        return self._loads(data)
+
+
+CODECS: Dict[str, Type[JSONCodec]] = {
+    StdlibCodec.name: StdlibCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def default_codec() -> JSONCodec:
+    return OrjsonCodec() if orjson is not None else StdlibCodec()
+
+
+def get_codec(codec: Union[None, str, JSONCodec] = None) -> JSONCodec:
+    """Resolve um codec por nome (`'json'`, `'orjson'`) ou instância; `None` escolhe o mais rápido disponível."""
+
+    if codec is None:
+        return DEFAULT_CODEC
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec not in CODECS:
+        raise ValueError(f'Codec JSON desconhecido: {codec!r}')
+    return CODECS[codec]()
+
+
+DEFAULT_CODEC: JSONCodec = default_codec()
+
+
+DEFAULT_FLUSH_SIZE = 64 * 1024
+
+
+def iter_json_array(
+    items: Union[Iterable[Any], AsyncIterable[Any]],
+    serialize: Optional[Callable[[Any], Any]] = None,
+    codec: JSONCodec = DEFAULT_CODEC,
+    flush_size: int = DEFAULT_FLUSH_SIZE
+) -> Union[Iterator[bytes], AsyncIterator[bytes]]:
+    """
+    Codifica `items` como um array JSON em pedaços de ~`flush_size` bytes,
+    consumindo o iterador (ex.: `yield_per` do SQL ou cursor do Mongo)
+    conforme o envio avança. Só o pedaço atual fica em memória. Para
+    iteradores assíncronos devolve um iterador assíncrono; o resultado
+    vai direto para `StreamingResponse`.
+    """
+
+    if hasattr(items, '__aiter__'):
+        return _aiter_json_array(items, serialize, codec, flush_size)  # type: ignore
+    return _iter_json_array(items, serialize, codec, flush_size)  # type: ignore
+
+
+def _iter_json_array(
+    items: Iterable[Any],
+    serialize: Optional[Callable[[Any], Any]],
+    codec: JSONCodec,
+    flush_size: int
+) -> Iterator[bytes]:
+
+    dumps = codec.dumps
+    buffer = bytearray(b'[')
+    separator = b''
+    try:
+        for item in items:
+            buffer += separator
+            buffer += dumps(serialize(item) if serialize else item)
+            separator = b','
+            if len(buffer) >= flush_size:
+                yield bytes(buffer)
+                buffer.clear()
+    finally:
+        # o encoder é dono do iterador: fecha o cursor também se o envio parar
+        close = getattr(items, 'close', None)
+        if close is not None:
+            close()
+
+    buffer += b']'
+    yield bytes(buffer)
+
+
+async def _aiter_json_array(
+    items: AsyncIterable[Any],
+    serialize: Optional[Callable[[Any], Any]],
+    codec: JSONCodec,
+    flush_size: int
+) -> AsyncIterator[bytes]:
+
+    dumps = codec.dumps
+    buffer = bytearray(b'[')
+    separator = b''
+    try:
+        async for item in items:
+            buffer += separator
+            buffer += dumps(serialize(item) if serialize else item)
+            separator = b','
+            if len(buffer) >= flush_size:
+                yield bytes(buffer)
+                buffer.clear()
+    finally:
+        aclose = getattr(items, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+    buffer += b']'
+    yield bytes(buffer)
@@ -1,11 +1,14 @@
 from datetime import datetime
-from src.models import Request
+from src.codec import iter_json_array
+from src.models import Request, StreamingResponse
 from typing import Annotated, Optional
 from src.domain.models import Consulta
 from src.repository import ConsultaRepository
 from src.exceptions.http import NotFoundError
 from src.utils import (
     ParamsValidator,
+    check_etag,
+    make_etag,
     make_response,
     validate_params,
     get, post, put, patch, delete
@@ -38,10 +41,20 @@ class ConsultaController:
     @validate_params(IdValidator)
     async def get_consulta(self, request: Request):
         consulta_id: int = request.query['id']
-        consulta: Optional[Consulta] = self.consulta_repository.get_by_id(consulta_id)
+        consulta = self.consulta_repository.read_by_id(consulta_id)
         if consulta is None:
             raise NotFoundError('Consulta not found')
-        return make_response(consulta)
+        # polling: o 304 sai antes de serializar a linha
+        version = self.consulta_repository.version(consulta)
+        not_modified = check_etag(request, version)
+        if not_modified is not None:
+            return not_modified
+        return make_response(self.consulta_repository.to_dict(consulta), {'etag': make_etag(version)})
+
+    @get("/all/")
+    async def list_consultas(self, request: Request):
+        rows = self.consulta_repository.iter_all()
+        return StreamingResponse(200, iter_json_array(rows, self.consulta_repository.to_dict))
 
     @post("/")    
     async def create_consulta(self, request: Request):
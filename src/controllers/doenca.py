@@ -1,10 +1,13 @@
 from src.exceptions.http import NotFoundError
-from src.models import Request
+from src.codec import iter_json_array
+from src.models import Request, StreamingResponse
 from typing import Annotated, Optional
 from src.domain.models import Doenca
 from src.repository import DoencaRepository
 from src.utils import (
     ParamsValidator,
+    check_etag,
+    make_etag,
     make_response,
     validate_params,
     get, post, put, delete
@@ -33,10 +36,20 @@ class DoencaController:
     @validate_params(IdValidator)
     async def get_doenca(self, request: Request):
         doenca_id: int = request.query['id']
-        doenca: Optional[Doenca] = self.doenca_repository.get_by_id(doenca_id)
+        doenca = self.doenca_repository.read_by_id(doenca_id)
         if doenca is None:
             raise NotFoundError('Doença not found')
-        return make_response(doenca)
+        # polling: o 304 sai antes de serializar a linha
+        version = self.doenca_repository.version(doenca)
+        not_modified = check_etag(request, version)
+        if not_modified is not None:
+            return not_modified
+        return make_response(self.doenca_repository.to_dict(doenca), {'etag': make_etag(version)})
+
+    @get("/all/")
+    async def list_doencas(self, request: Request):
+        rows = self.doenca_repository.iter_all()
+        return StreamingResponse(200, iter_json_array(rows, self.doenca_repository.to_dict))
 
     @post("/")
     async def create_doenca(self, request: Request):
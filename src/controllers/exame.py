@@ -2,11 +2,14 @@ from typing import Annotated, Optional
 from datetime import date
 
 from src.exceptions.http import NotFoundError
-from src.models import Request
+from src.codec import iter_json_array
+from src.models import Request, StreamingResponse
 from src.domain.models import Exame
 from src.repository import ExameRepository
 from src.utils import (
     ParamsValidator,
+    check_etag,
+    make_etag,
     make_response,
     validate_params,
     get, post, put, patch, delete
@@ -36,10 +39,20 @@ class ExameController:
     @validate_params(IdValidator)
     async def get_exame(self, request: Request):
         exame_id: int = request.query['id']
-        exame: Optional[Exame] = self.exame_repository.get_by_id(exame_id)
+        exame = self.exame_repository.read_by_id(exame_id)
         if exame is None:
             raise NotFoundError('Exame not found')
-        return make_response(exame)
+        # polling: o 304 sai antes de serializar a linha
+        version = self.exame_repository.version(exame)
+        not_modified = check_etag(request, version)
+        if not_modified is not None:
+            return not_modified
+        return make_response(self.exame_repository.to_dict(exame), {'etag': make_etag(version)})
+
+    @get("/all/")
+    async def list_exames(self, request: Request):
+        rows = self.exame_repository.iter_all()
+        return StreamingResponse(200, iter_json_array(rows, self.exame_repository.to_dict))
 
     @post("/")
     async def create_exame(self, request: Request):
@@ -2,11 +2,14 @@ from typing import Annotated, Optional
 from datetime import date
 
 from src.exceptions.http import NotFoundError
-from src.models import Request
+from src.codec import iter_json_array
+from src.models import Request, StreamingResponse
 from src.domain.models import Medicamento
 from src.repository import MedicamentoRepository
 from src.utils import (
     ParamsValidator,
+    check_etag,
+    make_etag,
     make_response,
     validate_params,
     get, post, put, delete
@@ -39,10 +42,20 @@ class MedicamentoController:
     @validate_params(IdValidator)
     async def get_medicamento(self, request: Request):
         medicamento_id: int = request.query['id']
-        medicamento: Optional[Medicamento] = self.medicamento_repository.get_by_id(medicamento_id)
+        medicamento = self.medicamento_repository.read_by_id(medicamento_id)
         if medicamento is None:
             raise NotFoundError('medicamento not found')
-        return make_response(medicamento)
+        # polling: o 304 sai antes de serializar a linha
+        version = self.medicamento_repository.version(medicamento)
+        not_modified = check_etag(request, version)
+        if not_modified is not None:
+            return not_modified
+        return make_response(self.medicamento_repository.to_dict(medicamento), {'etag': make_etag(version)})
+
+    @get("/all/")
+    async def list_medicamentos(self, request: Request):
+        rows = self.medicamento_repository.iter_all()
+        return StreamingResponse(200, iter_json_array(rows, self.medicamento_repository.to_dict))
 
     @post("/")
     async def create_medicamento(self, request: Request):
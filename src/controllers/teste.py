@@ -35,6 +35,6 @@ class TesteController:
             {
                 'token': token,
                 'user_id': body.user_id,
-                'query': request.query
+                'query': dict(request.query)
             }
         )
@@ -1,16 +1,76 @@
 from datetime import date, datetime
-from typing import Any, Dict, Optional, Union
+import inspect
+from typing import Any, Callable, Dict, Optional, Tuple, Union, get_type_hints
+
+
+DATE_TYPES = (date, datetime)
 
 
 def date_converter(value: Union[date, datetime]):
-    result = value.isoformat()
-    print('converter_result:', result)
-    return result
+    return value.isoformat()
+
+
+def is_date_hint(hint: Any) -> bool:
+    if hint in DATE_TYPES:
+        return True
+    return any(is_date_hint(arg) for arg in getattr(hint, '__args__', ()))
+
+
+def model_fields(init: Callable) -> Optional[Tuple[Tuple[str, bool], ...]]:
+    """
+    Campos públicos declarados no `__init__` do modelo, com a indicação de
+    quais são datas. `None` quando o `__init__` só recebe `**kwargs`.
+    """
+
+    try:
+        hints = get_type_hints(init)
+    except Exception:
+        hints = {}
+
+    fields = []
+    for param in list(inspect.signature(init).parameters.values())[1:]:
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        if not param.name.startswith('_'):
+            fields.append((param.name, is_date_hint(hints.get(param.name))))
+
+    return tuple(fields) or None
+
+
+def make_serializer(cls: type, fields: Tuple[Tuple[str, bool], ...]) -> Callable[[Any], dict]:
+    """
+    Gera o `to_dict` específico do modelo: um único dict literal com os
+    campos conhecidos, datas convertidas com `isoformat` e o `id` à frente.
+    """
+
+    items = []
+    for name, is_date in fields:
+        if is_date:
+            value = f'(v.isoformat() if (v := self.{name}).__class__ in DATE_TYPES else v)'
+        else:
+            value = f'self.{name}'
+        items.append(f'{name!r}: {value}')
+
+    body = ', '.join(items)
+    source = (
+        'def to_dict(self):\n'
+        '    _id = self._id\n'
+        '    if _id:\n'
+        f'        return {{"id": _id, {body}}}\n'
+        f'    return {{{body}}}\n'
+    )
+
+    namespace: Dict[str, Any] = {'DATE_TYPES': DATE_TYPES}
+    exec(compile(source, f'<serializer {cls.__name__}>', 'exec'), namespace)
+    serializer = namespace['to_dict']
+    serializer.__qualname__ = f'{cls.__name__}.to_dict'
+    return serializer
 
 
 class DomainModel:
 
     _id: Optional[int]
+    _fields: Optional[Tuple[Tuple[str, bool], ...]] = None
 
     converters = {
         date: date_converter,
@@ -21,6 +81,23 @@ class DomainModel:
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # lido aqui porque o mapper do SQLAlchemy substitui o __init__ depois
+        if '__init__' in cls.__dict__:
+            cls._fields = model_fields(cls.__dict__['__init__'])
+
+    @classmethod
+    def serializer(cls) -> Callable[[Any], dict]:
+        serializer = cls.__dict__.get('_serializer')
+        if serializer is None:
+            if cls._fields is None:
+                serializer = DomainModel.reflect_dict
+            else:
+                serializer = make_serializer(cls, cls._fields)
+            cls._serializer = serializer
+        return serializer
+
     @property
     def id(self):
         if self._id is None:
@@ -36,6 +113,9 @@ class DomainModel:
 
 
     def to_dict(self) -> dict:
+        return self.serializer()(self)
+
+    def reflect_dict(self) -> dict:
         result: Dict[str, Any] = {}
         if self._id:
             result['id'] = self._id
@@ -88,10 +88,7 @@ def auth_required(func: Callable):
     @wraps(func)
     async def inner(self, request: Request):
 
-        auth = (
-            request.headers.get('Authorization') or 
-            request.headers.get('authorization')
-        )
+        auth = request.headers.get('authorization')
 
         if auth is None:
             raise UnauthorizedError
@@ -1,18 +1,29 @@
+from typing import Dict, Optional
+
+
 class HTTPException(Exception):
-    def __init__(self, detail: str, code: int) -> None:
+    def __init__(
+        self,
+        detail: str,
+        code: int,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
         self.code = code
         self.detail = detail
+        self.headers = headers
         super().__init__(detail, code)
 
     def json(self):
+        headers = {'content-type': 'application/json'}
+        if self.headers:
+            headers.update(self.headers)
+
         return {
             "status": self.code,
             "body": {
                 "detail": self.detail
             },
-            "headers": {
-                'content-type': 'application/json'
-            }
+            "headers": headers
         }
 
 
@@ -38,8 +49,12 @@ class NotFoundError(HTTPException):
 
 
 class MethodNotAllowedError(HTTPException):
-    def __init__(self, detail: str = "Method Not Allowed") -> None:
-        super().__init__(detail, 405)
+    def __init__(
+        self,
+        detail: str = "Method Not Allowed",
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        super().__init__(detail, 405, headers)
 
 
 class ConflictError(HTTPException):
@@ -52,6 +67,11 @@ class GoneError(HTTPException):
         super().__init__(detail, 410)
 
 
+class PayloadTooLargeError(HTTPException):
+    def __init__(self, detail: str = "Payload Too Large") -> None:
+        super().__init__(detail, 413)
+
+
 class UnprocessableEntityError(HTTPException):
     def __init__(self, detail: str = "Unprocessable Entity") -> None:
         super().__init__(detail, 422)
@@ -1,16 +1,14 @@
-
-
-
-import json
+import asyncio
+import hashlib
 import logging
 import time
+import zlib
 
 import traceback
-from typing import Any, Dict, List, Tuple
-from granian._granian import RSGIHTTPProtocol
+from typing import Any, Dict, List, Optional, Tuple
 from src import BaseApp
 from src.exceptions.http import HTTPException, InternalServerError
-from src.utils import assure_tuples_of_bytes, assure_tuples_of_str, get_protocol_args, headers_to_response, is_rsgi_app
+from src.utils import NO_BODY_STATUS, etag_matches, make_etag
 
 
 LOG_STACK_TRACE = True
@@ -23,31 +21,18 @@ class RequestLoggingMiddleware(BaseApp):
         self.last = True
         self.parent = None
 
-    async def exec(self, *args):
-
-        scope, protocol_or_receive, send = get_protocol_args(args)
-        mode = 'RSGI' if is_rsgi_app(scope) else 'ASGI'
-
+    async def exec_rsgi(self, scope, protocol):
         start_time = time.time()
+        await self.app.__rsgi__(scope, protocol)
+        self.log_request('RSGI', start_time, scope.client)
 
-        if is_rsgi_app(scope):
-
-            protocol = protocol_or_receive
-
-            await self.app.__rsgi__(scope, protocol)
-        else:
-            receive = protocol_or_receive
-            assert receive
-            assert send
-            await self.app(scope, receive, send)
+    async def exec_asgi(self, scope, receive, send):
+        start_time = time.time()
+        await self.app(scope, receive, send)
+        self.log_request('ASGI', start_time, str(scope['client']))
 
+    def log_request(self, mode: str, start_time: float, client: str):
         duration = time.time() - start_time
-
-        try:
-            client = scope.client
-        except:
-            client = str(scope['client'])
-
         self.logger.info(f"Request {mode} processed in {duration:.4f} seconds from {client}")
 
 
@@ -56,9 +41,15 @@ class AuthenticationMiddleware(BaseApp):
         self.app = app
         self.last = True
 
-    async def exec(self, *args):
-        scope, protocol_or_receive, send = get_protocol_args(args)
+    async def exec_rsgi(self, scope, protocol):
+        self.authenticate(scope)
+        await self.app.__rsgi__(scope, protocol)
+
+    async def exec_asgi(self, scope, receive, send):
+        self.authenticate(scope)
+        await self.app(scope, receive, send)
 
+    def authenticate(self, scope):
         headers = self.get_headers_from_scope(scope)
         authorization_header = dict(headers).get(b"authorization", None)
         if authorization_header is None:
@@ -75,17 +66,6 @@ class AuthenticationMiddleware(BaseApp):
                 pass
                 # scope.current_user = 'John Doe'
 
-        if is_rsgi_app(scope):
-            assert protocol_or_receive
-            protocol = protocol_or_receive
-
-            await self.app.__rsgi__(scope, protocol)
-        else:
-            receive = protocol_or_receive
-            assert receive
-            assert send
-            await self.app(scope, receive, send)
-
     def __is_valid_token(self, token):
         return token == b"valid-token"
     
@@ -96,22 +76,24 @@ class HandleErrorMiddleware(BaseApp):
         self.last = True
         self.parent = None
 
-    async def exec(self, *args):
-        protocol: RSGIHTTPProtocol
-        scope, protocol_or_receive, send = get_protocol_args(args)
+    async def exec_rsgi(self, scope, protocol):
         try:
-            if is_rsgi_app(scope):
-                assert protocol_or_receive
-                protocol = protocol_or_receive
+            await self.app.__rsgi__(scope, protocol)
+        except Exception as error:
+            status, body, headers = self.error_response(error)
+            await self.send_response_rsgi(protocol, status, body, headers)
 
-                await self.app.__rsgi__(scope, protocol)
-            else:
-                receive = protocol_or_receive
-                assert receive
-                assert send
-                await self.app(scope, receive, send)
+    async def exec_asgi(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        except Exception as error:
+            status, body, headers = self.error_response(error)
+            await self.send_response_asgi(send, status, body, headers)
+
+    def error_response(self, error: Exception) -> Tuple[int, bytes, Dict[str, str]]:
+        codec = self.root_app().codec
 
-        except (HTTPException, LookupError) as error:        
+        if isinstance(error, (HTTPException, LookupError)):
 
             if isinstance(error, LookupError):
                 response = {
@@ -126,35 +108,25 @@ class HandleErrorMiddleware(BaseApp):
             else:
                 response = error.json()
 
-            await self.send_response(
-                scope,
-                send or protocol_or_receive,
+            return (
                 response["status"],
-                json.dumps(response.get("body", {})),
+                codec.dumps(response.get("body", {})),
                 response.get('headers', {})
             )
 
-        except Exception as error:
-
-            if LOG_STACK_TRACE:
-                e = error
-                stacktrace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
-                print(stacktrace)
+        if LOG_STACK_TRACE:
+            e = error
+            stacktrace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            print(stacktrace)
 
-            http_exception = InternalServerError(f"Internal Server Error: {error}")
-            response = http_exception.json()
+        http_exception = InternalServerError(f"Internal Server Error: {error}")
+        response = http_exception.json()
 
-            response_headers = {'content-type': 'application/json'}
-            response_headers.update(response.get('headers', {}))
-            body = response.get("body", {})
+        response_headers = {'content-type': 'application/json'}
+        response_headers.update(response.get('headers', {}))
+        body = response.get("body", {})
 
-            await self.send_response(
-                scope,
-                send or protocol_or_receive,
-                response["status"],
-                json.dumps(body),
-                headers=response_headers
-            )
+        return response["status"], codec.dumps(body), response_headers
 
 
 class CORSMiddleware2(BaseApp):
@@ -170,108 +142,515 @@ class CORSMiddleware2(BaseApp):
             "access-control-allow-headers": "Content-Type, Authorization"
         }
 
-    async def exec(self, *args):
-        scope, protocol_or_receive, send = get_protocol_args(args)
-        try:
-            client = scope.client.split(':')[0]
-        except Exception:
-            client = scope['client'][0]
-
-        original_response = await self._capture_response(
-            scope,
-            protocol_or_receive,
-            send
+    async def exec_rsgi(self, scope, protocol):
+        capture = ResponseCapture(protocol)
+        await self.app.__rsgi__(scope, capture)
+
+        client = scope.client.split(':')[0]
+        await self.send_response_rsgi(
+            protocol,
+            capture.status,
+            capture.body,
+            self.cors_headers(client, capture.headers)
         )
 
+    async def exec_asgi(self, scope, receive, send):
+        capture = ResponseCapture()
+        await self.app(scope, receive, capture.send)
+
+        client = scope['client'][0]
+        await self.send_response_asgi(
+            send,
+            capture.status,
+            capture.body,
+            self.cors_headers(client, capture.headers)
+        )
+
+    def cors_headers(self, client: str, headers: Dict[str, Any]) -> Dict[str, Any]:
         for host in self.whitelist:
             if client in host:
+                headers.update(self.headers)
+                break
+
+        return headers
+
+
+class ResponseCapture:
+    """
+    Faz o papel do protocol RSGI (ou do `send` ASGI) para guardar a
+    resposta da aplicação interna em vez de enviá-la.
+    """
+
+    def __init__(self, protocol: Any = None) -> None:
+        self.protocol = protocol
+        self.status = 200
+        self.body = b''
+        self.headers: Dict[str, Any] = {}
+
+    async def __call__(self) -> bytes:
+        return await self.protocol()
+
+    def __aiter__(self):
+        return self.protocol.__aiter__()
+
+    def set_headers(self, headers):
+        for key, value in headers:
+            if isinstance(key, bytes) and isinstance(value, bytes):
+                self.headers[key.decode('utf-8')] = value.decode('utf-8')
+            else:
+                self.headers[key] = value
+
+    async def send(self, message: Dict[str, Any]):
+        if message["type"] == "http.response.start":
+            self.status = int(message["status"])
+            self.set_headers(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            self.body += message.get("body", b"")
+        elif message["type"] == "http.response.pathsend":
+            with open(message["path"], 'rb') as f:
+                self.body += f.read()
+        elif message["type"] == "http.response.zerocopy":
+            self.body += message["file"].read()
+
+    def response_str(self, status, headers, body):
+        self.response_bytes(status, headers, str(body).encode('utf-8'))
+
+    def response_bytes(self, status, headers, body):
+        self.status = int(status)
+        self.set_headers(headers)
+        self.body = body
+
+    def response_file(self, status, headers, file):
+        with open(file, 'rb') as f:
+            self.response_bytes(status, headers, f.read())
+
+    def response_stream(self, status, headers):
+        # A resposta é acumulada por inteiro antes do reenvio
+        self.status = int(status)
+        self.set_headers(headers)
+        return self
+
+    async def send_bytes(self, data: bytes):
+        self.body += data
+
+    async def send_str(self, data: str):
+        self.body += data.encode('utf-8')
+
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+# Codificações suportadas, em ordem de preferência, com o `wbits` do zlib
+ENCODINGS = {'gzip': 31, 'deflate': 15}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Escolhe gzip ou deflate conforme o `Accept-Encoding` (com pesos q)."""
+
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(','):
+        token, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def find_header(headers: List[Tuple[Any, Any]], name: str) -> Optional[Any]:
+    binary = bool(headers) and isinstance(headers[0][0], bytes)
+    key_name = name.encode('latin-1') if binary else name
+    for key, value in headers:
+        if key.lower() == key_name:
+            return value
+    return None
+
+
+def encoded_headers(
+    headers: List[Tuple[Any, Any]],
+    encoding: str,
+    content_length: Optional[int]
+) -> List[Tuple[Any, Any]]:
+
+    binary = bool(headers) and isinstance(headers[0][0], bytes)
+    convert = (lambda value: value.encode('latin-1')) if binary else (lambda value: value)
+    drop = convert('content-length')
+
+    etag_name = convert('etag')
+    weak = convert('W/')
+
+    result = []
+    for key, value in headers:
+        name = key.lower()
+        if name == drop:
+            continue
+        if name == etag_name and not value.startswith(weak):
+            # O body muda com a codificação: o ETag forte vira fraco
+            value = weak + value
+        result.append((key, value))
+
+    result.append((convert('content-encoding'), convert(encoding)))
+    result.append((convert('vary'), convert('accept-encoding')))
+    if content_length is not None:
+        result.append((convert('content-length'), convert(str(content_length))))
+    return result
+
+
+class CompressionMiddleware(BaseApp):
+    """
+    Comprime as respostas com gzip ou deflate (zlib), conforme o
+    `Accept-Encoding` do cliente. Parâmetros (dict opcional):
+
+    - `minimum_size`: bodies menores não são comprimidos (padrão 500 bytes);
+    - `level`: nível de compressão do zlib (padrão 6);
+    - `offload_size`: bodies a partir desse tamanho são comprimidos em uma
+      thread, sem bloquear o event loop (padrão 256 KiB).
+
+    Respostas em streaming são comprimidas pedaço a pedaço; arquivos e
+    respostas que já têm `content-encoding` passam sem alteração.
+    """
+
+    def __init__(self, app: BaseApp, params: Optional[Dict[str, Any]] = None):
+        params = params or {}
+        self.app = app
+        self.last = True
+        self.parent = None
+        self.minimum_size: int = params.get('minimum_size', 500)
+        self.level: int = params.get('level', 6)
+        self.offload_size: int = params.get('offload_size', 256 * 1024)
+
+    async def exec_rsgi(self, scope, protocol):
+        encoding = negotiate_encoding(scope.headers.get('accept-encoding') or '')
+        if encoding is None:
+            await self.app.__rsgi__(scope, protocol)
+            return
 
-                modified_headers: Dict[str, Any] = original_response["headers"]
-                modified_headers.update(self.headers)
+        compressed = CompressedProtocol(self, protocol, encoding)
+        await self.app.__rsgi__(scope, compressed)
+        await compressed.finish()
+
+    async def exec_asgi(self, scope, receive, send):
+        accept_encoding = ''
+        for key, value in scope.get('headers', ()):
+            if key == b'accept-encoding':
+                accept_encoding = value.decode('latin-1')
                 break
-        
-        if is_rsgi_app(scope):
-            await self.send_response(
-                scope,
-                protocol_or_receive,
-                original_response["status"],
-                original_response['body'],
-                modified_headers
-            )
+
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
             return
 
+        await self.app(scope, receive, CompressedSend(self, send, encoding))
+
+    def should_compress(
+        self,
+        status: int,
+        headers: List[Tuple[Any, Any]],
+        size: Optional[int] = None
+    ) -> bool:
+
+        if status < 200 or status in NO_BODY_STATUS:
+            return False
+        if size is not None and size < self.minimum_size:
+            return False
+        if find_header(headers, 'content-encoding') is not None:
+            return False
+
+        content_type = find_header(headers, 'content-type') or ''
+        if isinstance(content_type, bytes):
+            content_type = content_type.decode('latin-1')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def compressor(self, encoding: str):
+        return zlib.compressobj(self.level, zlib.DEFLATED, ENCODINGS[encoding])
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        compressor = self.compressor(encoding)
+        return compressor.compress(body) + compressor.flush()
+
+    async def compress_body(
+        self,
+        encoding: str,
+        status: int,
+        headers: List[Tuple[Any, Any]],
+        body: bytes
+    ) -> Tuple[List[Tuple[Any, Any]], bytes]:
+
+        if not self.should_compress(status, headers, len(body)):
+            return headers, body
+
+        if len(body) >= self.offload_size:
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(None, self.compress, encoding, body)
         else:
-            await self.send_response(
-                scope,
-                send,
-                original_response["status"],
-                original_response["body"],
-                modified_headers
+            compressed = self.compress(encoding, body)
+
+        if len(compressed) >= len(body):
+            return headers, body
+        return encoded_headers(headers, encoding, len(compressed)), compressed
+
+
+class InterceptedProtocol:
+    """
+    Protocol RSGI intermediário: respostas completas ficam guardadas em
+    `pending` até `finish`, chamado depois que o app interno retorna.
+    Leitura do body, arquivos e streams vão direto ao protocol real.
+    """
+
+    def __init__(self, protocol: Any) -> None:
+        self.protocol = protocol
+        self.pending: Optional[Tuple[int, List[Tuple[str, str]], bytes]] = None
+
+    async def __call__(self) -> bytes:
+        return await self.protocol()
+
+    def __aiter__(self):
+        return self.protocol.__aiter__()
+
+    def response_empty(self, status, headers):
+        self.protocol.response_empty(status, headers)
+
+    def response_file(self, status, headers, file):
+        self.protocol.response_file(status, headers, file)
+
+    def response_str(self, status, headers, body):
+        self.response_bytes(status, headers, body.encode('utf-8'))
+
+    def response_bytes(self, status, headers, body):
+        self.pending = (status, list(headers), body)
+
+    def response_stream(self, status, headers):
+        return self.protocol.response_stream(status, headers)
+
+    async def finish(self):
+        if self.pending is not None:
+            self.protocol.response_bytes(*self.pending)
+
+
+class CompressedProtocol(InterceptedProtocol):
+    """
+    Protocol RSGI intermediário da `CompressionMiddleware`. Respostas
+    completas são comprimidas em `finish`; streams são comprimidos
+    conforme os pedaços chegam.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, protocol: Any, encoding: str) -> None:
+        super().__init__(protocol)
+        self.middleware = middleware
+        self.encoding = encoding
+        self.transport: Any = None
+        self.stream_compressor: Any = None
+
+    def response_stream(self, status, headers):
+        headers = list(headers)
+        if self.middleware.should_compress(status, headers):
+            self.stream_compressor = self.middleware.compressor(self.encoding)
+            headers = encoded_headers(headers, self.encoding, None)
+        self.transport = self.protocol.response_stream(status, headers)
+        return self
+
+    async def send_bytes(self, data: bytes):
+        if self.stream_compressor is not None:
+            data = self.stream_compressor.compress(data)
+            if not data:
+                return
+        await self.transport.send_bytes(data)
+
+    async def send_str(self, data: str):
+        await self.send_bytes(data.encode('utf-8'))
+
+    async def finish(self):
+        if self.pending is not None:
+            status, headers, body = self.pending
+            headers, body = await self.middleware.compress_body(self.encoding, status, headers, body)
+            self.protocol.response_bytes(status, headers, body)
+
+        elif self.stream_compressor is not None:
+            await self.transport.send_bytes(self.stream_compressor.flush())
+
+
+class CompressedSend:
+    """`send` ASGI intermediário da `CompressionMiddleware`."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Any, encoding: str) -> None:
+        self.middleware = middleware
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Dict[str, Any]] = None
+        self.stream_compressor: Any = None
+
+    async def __call__(self, message: Dict[str, Any]):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+
+        if message['type'] != 'http.response.body':
+            await self.flush_start()
+            await self.send(message)
+            return
+
+        if self.start is not None:
+            await self.begin(message)
+            return
+
+        if self.stream_compressor is None:
+            await self.send(message)
+            return
+
+        more_body = message.get('more_body', False)
+        data = self.stream_compressor.compress(message.get('body', b''))
+        if not more_body:
+            data += self.stream_compressor.flush()
+        if data or not more_body:
+            await self.send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+    async def flush_start(self):
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+    async def begin(self, message: Dict[str, Any]):
+        start, self.start = self.start, None
+        status = start['status']
+        headers = list(start.get('headers', []))
+
+        if not message.get('more_body', False):
+            headers, body = await self.middleware.compress_body(
+                self.encoding, status, headers, message.get('body', b'')
             )
+            await self.send(dict(start, headers=headers))
+            await self.send({'type': 'http.response.body', 'body': body, 'more_body': False})
             return
 
-    async def _capture_response(self, scope, protocol_or_receive, send):
+        if self.middleware.should_compress(status, headers):
+            self.stream_compressor = self.middleware.compressor(self.encoding)
+            start = dict(start, headers=encoded_headers(headers, self.encoding, None))
 
-        response_body = ''
-        status = 200
-        headers: List[Tuple[str, str]] = []
+        await self.send(start)
+        await self(message)
 
-        class RSGICapture:
 
-            def __init__(self, scope, protocol_or_receive, send) -> None:
-                self.scope = scope
-                self.protocol_or_receive = protocol_or_receive
-                self.send = send
+# Headers mantidos em um 304, além do próprio etag
+NOT_MODIFIED_HEADERS = ('etag', 'cache-control', 'content-location', 'date', 'expires', 'vary')
 
-            async def __call__(self) -> Any:
-                return await self.protocol_or_receive()
 
+class ETagMiddleware(BaseApp):
+    """
+    GET condicional: respostas 200 a GET/HEAD recebem um ETag forte (hash
+    do body codificado, ou o `etag` que o handler já definiu) e, se o
+    `If-None-Match` do cliente bate, viram um 304 sem body. Com a
+    `CompressionMiddleware`, adicione esta depois (por fora) dela.
+    """
 
-            async def send(self, *_, **kwargs):
-                
-                nonlocal status
-                nonlocal headers
-                nonlocal response_body
+    METHODS = ('GET', 'HEAD')
 
-                status = int(kwargs['status'])
-                headers = list(kwargs['headers'])
-                response_body = str(kwargs['body'])
-                
+    def __init__(self, app: BaseApp):
+        self.app = app
+        self.last = True
+        self.parent = None
 
-            def response_str(self, *_, **kwargs):
+    async def exec_rsgi(self, scope, protocol):
+        if scope.method not in self.METHODS:
+            await self.app.__rsgi__(scope, protocol)
+            return
 
-                nonlocal status
-                nonlocal headers
-                nonlocal response_body
+        intercepted = ETagProtocol(self, protocol, scope.headers.get('if-none-match'))
+        await self.app.__rsgi__(scope, intercepted)
+        await intercepted.finish()
 
-                status = int(kwargs['status'])
-                headers = list(kwargs['headers'])
-                response_body = str(kwargs['body'])
+    async def exec_asgi(self, scope, receive, send):
+        if scope['method'] not in self.METHODS:
+            await self.app(scope, receive, send)
+            return
 
+        if_none_match = None
+        for key, value in scope.get('headers', ()):
+            if key == b'if-none-match':
+                if_none_match = value.decode('latin-1')
+                break
 
-        capture = RSGICapture(scope, protocol_or_receive, send)
-        if is_rsgi_app(scope):
-            await self.app.__rsgi__(scope, capture)
-        else:
-            receive = protocol_or_receive
-            await self.app(scope, receive, capture.send)
+        await self.app(scope, receive, ETagSend(self, send, if_none_match))
 
-        body = response_body.encode('utf-8')
+    def conditional(
+        self,
+        status: int,
+        headers: List[Tuple[Any, Any]],
+        body: bytes,
+        if_none_match: Optional[str]
+    ) -> Tuple[int, List[Tuple[Any, Any]], bytes]:
 
-        result_headers = {}
-        for header in headers:
-            key, value = header
-            if isinstance(key, bytes) and isinstance(value, bytes):
-                result_headers[key.decode('utf-8')] = value.decode('utf-8')
-            else:
-                result_headers[key] = value
+        if status != 200:
+            return status, headers, body
 
-        response = {
-            "status": status,
-            "body": body.decode("utf-8"),
-            "headers": result_headers
-        }
+        binary = bool(headers) and isinstance(headers[0][0], bytes)
+        etag = find_header(headers, 'etag')
+        if etag is None:
+            etag = make_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+            etag_header = etag.encode('latin-1') if binary else etag
+            headers = headers + [(b'etag' if binary else 'etag', etag_header)]
 
-        print({"275 middlewares": response})
+        etag_value = etag.decode('latin-1') if isinstance(etag, bytes) else etag
+        if not etag_matches(if_none_match, etag_value):
+            return status, headers, body
 
-        return response
+        kept = tuple(name.encode('latin-1') if binary else name for name in NOT_MODIFIED_HEADERS)
+        return 304, [(key, value) for key, value in headers if key.lower() in kept], b''
+
+
+class ETagProtocol(InterceptedProtocol):
+    """Protocol RSGI intermediário da `ETagMiddleware`."""
+
+    def __init__(self, middleware: ETagMiddleware, protocol: Any, if_none_match: Optional[str]) -> None:
+        super().__init__(protocol)
+        self.middleware = middleware
+        self.if_none_match = if_none_match
+
+    async def finish(self):
+        if self.pending is not None:
+            self.protocol.response_bytes(
+                *self.middleware.conditional(*self.pending, self.if_none_match)
+            )
+
+
+class ETagSend:
+    """`send` ASGI intermediário da `ETagMiddleware`; streams passam direto."""
+
+    def __init__(self, middleware: ETagMiddleware, send: Any, if_none_match: Optional[str]) -> None:
+        self.middleware = middleware
+        self.send = send
+        self.if_none_match = if_none_match
+        self.start: Optional[Dict[str, Any]] = None
+
+    async def __call__(self, message: Dict[str, Any]):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            return
+
+        if self.start is None:
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        if message['type'] != 'http.response.body' or message.get('more_body', False):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        status, headers, body = self.middleware.conditional(
+            start['status'],
+            list(start.get('headers', [])),
+            message.get('body', b''),
+            self.if_none_match
+        )
+        await self.send(dict(start, status=status, headers=headers))
+        await self.send({'type': 'http.response.body', 'body': body, 'more_body': False})
@@ -1,36 +1,258 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Callable, Dict
+from dataclasses import dataclass, field
+import mimetypes
+import os
+from urllib.parse import parse_qs
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator,
+    List, Mapping, Optional, TypeVar, Union
+)
 
+from src.exceptions.http import UnprocessableEntityError
 
 
-@dataclass
+T = TypeVar('T')
+
+
+
+class Headers(Mapping[str, str]):
+    """
+    Headers da request sem cópia: envolve a lista crua do ASGI (pares de
+    bytes) ou o objeto de headers do RSGI e decodifica só as chaves
+    consultadas. A busca ignora maiúsculas/minúsculas; `getlist` devolve
+    todos os valores de um header repetido.
+    """
+
+    __slots__ = ('raw', 'rsgi', 'cache')
+
+    def __init__(self, raw: Any, rsgi: bool = False) -> None:
+        self.raw = raw
+        self.rsgi = rsgi
+        self.cache: Dict[str, Optional[str]] = {}
+
+    def __repr__(self) -> str:
+        return f'Headers({dict(self.items())})'
+
+    def get(self, key: str, default: Any = None) -> Any:  # type: ignore
+        key = key.lower()
+        try:
+            value = self.cache[key]
+        except KeyError:
+            value = self.cache[key] = self._lookup(key)
+        return default if value is None else value
+
+    def _lookup(self, key: str) -> Optional[str]:
+        if self.rsgi:
+            return self.raw.get(key)
+
+        name = key.encode('latin-1')
+        for raw_key, raw_value in self.raw:
+            if raw_key == name:
+                return raw_value.decode('utf-8')
+        return None
+
+    def getlist(self, key: str) -> List[str]:
+        key = key.lower()
+        if self.rsgi:
+            return list(self.raw.get_all(key))
+
+        name = key.encode('latin-1')
+        return [
+            raw_value.decode('utf-8')
+            for raw_key, raw_value in self.raw
+            if raw_key == name
+        ]
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        if self.rsgi:
+            keys: Iterable[str] = self.raw.keys()
+        else:
+            keys = (raw_key.decode('latin-1') for raw_key, _ in self.raw)
+
+        seen = set()
+        for key in keys:
+            key = key.lower()
+            if key not in seen:
+                seen.add(key)
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @classmethod
+    def from_dict(cls, headers: Mapping[str, str]) -> Headers:
+        return cls([
+            (key.lower().encode('latin-1'), value.encode('utf-8'))
+            for key, value in headers.items()
+        ])
+
+
+class QueryParams(Mapping[str, str]):
+    """
+    Query string da request, decodificada só no primeiro acesso. O acesso
+    por chave devolve o primeiro valor; `getlist` devolve todos os valores
+    de uma chave repetida (`?id=1&id=2`). `get_int`, `get_float` e
+    `get_bool` convertem o valor e respondem 422 se ele for inválido.
+    """
+
+    __slots__ = ('query_string', 'values')
+
+    TRUE_VALUES = frozenset({'1', 'true', 'on', 'yes', 'sim'})
+    FALSE_VALUES = frozenset({'0', 'false', 'off', 'no', 'nao', 'não'})
+
+    def __init__(self, query_string: Union[str, bytes] = '') -> None:
+        self.query_string = query_string
+        self.values: Optional[Dict[str, List[str]]] = None
+
+    def __repr__(self) -> str:
+        return f'QueryParams({self.parsed()})'
+
+    def parsed(self) -> Dict[str, List[str]]:
+        if self.values is None:
+            query_string = self.query_string
+            if isinstance(query_string, bytes):
+                query_string = query_string.decode('utf-8', errors='replace')
+            self.values = parse_qs(query_string, keep_blank_values=True) if query_string else {}
+        return self.values
+
+    def __getitem__(self, key: str) -> str:
+        return self.parsed()[key][0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.parsed())
+
+    def __len__(self) -> int:
+        return len(self.parsed())
+
+    def getlist(self, key: str, type: Optional[Callable[[str], T]] = None) -> List[Any]:
+        values = self.parsed().get(key, [])
+        if type is None:
+            return list(values)
+        return [self.convert(key, value, type) for value in values]
+
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.get(key)
+        return default if value is None else self.convert(key, value, int)
+
+    def get_float(self, key: str, default: Optional[float] = None) -> Optional[float]:
+        value = self.get(key)
+        return default if value is None else self.convert(key, value, float)
+
+    def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
+        value = self.get(key)
+        if value is None:
+            return default
+        if value.lower() in self.TRUE_VALUES:
+            return True
+        if value.lower() in self.FALSE_VALUES:
+            return False
+        raise UnprocessableEntityError(f"Parâmetro '{key}' inválido")
+
+    @staticmethod
+    def convert(key: str, value: str, type: Callable[[str], T]) -> T:
+        try:
+            return type(value)
+        except (TypeError, ValueError):
+            raise UnprocessableEntityError(f"Parâmetro '{key}' inválido")
+
+
+@dataclass(slots=True)
 class Request:
-    query: dict[str, Any]
+    query: Mapping[str, Any]
     get_body: Callable
-    headers: dict
+    headers: Mapping[str, str]
+
+    def iter_body(self) -> AsyncIterator[Any]:
+        """Itens de um body NDJSON ou array JSON, decodificados um a um."""
+        return self.get_body.items()
 
 
-@dataclass
+@dataclass(slots=True)
 class Response:
     status: int
     body: Any
     headers: Dict[str, str]
 
 
+@dataclass(slots=True)
+class StreamingResponse(Response):
+    """
+    Resposta enviada em pedaços: `body` é um iterador (síncrono ou
+    assíncrono) de `bytes` ou `str`, consumido só durante o envio.
+    Não há content-length; o servidor usa transferência chunked.
+    """
+
+    body: Union[Iterable[Union[bytes, str]], AsyncIterable[Union[bytes, str]]]
+    headers: Dict[str, str] = field(
+        default_factory=lambda: {'content-type': 'application/json'}
+    )
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        if hasattr(self.body, '__aiter__'):
+            async for chunk in self.body:  # type: ignore
+                yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        else:
+            for chunk in self.body:  # type: ignore
+                yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+    async def aclose(self) -> None:
+        """Fecha o iterador do body (ex.: um cursor do banco), mesmo com o envio interrompido."""
+        aclose = getattr(self.body, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+            return
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+
+
+@dataclass(slots=True)
+class FileResponse(Response):
+    """
+    Resposta com o conteúdo de um arquivo: `body` é o caminho. O arquivo
+    é entregue pelo servidor (RSGI `response_file`, ASGI `pathsend` ou
+    `zerocopy`) e só é lido em Python, em pedaços, quando não há suporte.
+    """
+
+    body: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    chunk_size: int = 64 * 1024
+
+    def __post_init__(self) -> None:
+        if 'content-type' not in self.headers:
+            content_type, _ = mimetypes.guess_type(self.body)
+            self.headers['content-type'] = content_type or 'application/octet-stream'
+        if 'content-length' not in self.headers:
+            self.headers['content-length'] = str(os.stat(self.body).st_size)
+
+
 class DotDict(dict):
-    
+    """
+    Body JSON com acesso por atributo. Sem `__dict__` por instância: o
+    atributo é a própria chave, e a escrita vai direto para o dict.
+    """
+
+    __slots__ = ()
+
+    __setattr__ = dict.__setitem__
+
     def __getattr__(self, name):
         try:
             return self[name]
         except KeyError:
-            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
-    
-    def __setattr__(self, name, value):
-        self[name] = value
-    
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'") from None
+
     def __delattr__(self, name):
         try:
             del self[name]
         except KeyError:
-            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+            raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'") from None
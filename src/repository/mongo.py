@@ -1,5 +1,5 @@
 from bson import ObjectId
-from typing import Any, List, Optional, Type, TypeVar, Generic
+from typing import Any, AsyncIterator, List, Optional, Type, TypeVar, Generic
 from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 from motor.motor_asyncio import AsyncIOMotorClient
 from src.domain.models import (
@@ -28,8 +28,13 @@ class GenericRepository(Generic[T]):
         results = [self.model(**doc) async for doc in cursor]
         return results
 
+    async def iter_all(self, filters: Optional[dict] = None, batch_size: int = 500) -> AsyncIterator[T]:
+        cursor = self.collection.find(filters or {}, batch_size=batch_size)
+        async for doc in cursor:
+            yield self.model(**doc)
+
     async def create(self, item: DomainModel) -> T:
-        result = await self.collection.insert_one(item.to_dict())
+        result = await self.collection.insert_one(item.serializer()(item))
         item_id = result.inserted_id
         result = await self.get_by_id(item_id)
         if result is None:
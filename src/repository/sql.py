@@ -1,4 +1,6 @@
-from typing import Any, List, Optional, Dict, Type, TypeVar, Generic, Union
+import hashlib
+from typing import Any, Iterator, List, Optional, Dict, Type, TypeVar, Generic, Union
+from sqlalchemy import Result, Row, Select, Table, bindparam, inspect, select
 from sqlalchemy.orm import Session
 from src.domain.models import (
     Consulta, Doenca, Exame, Medicamento, Paciente, Tarefa
@@ -14,6 +16,52 @@ class GenericRepository(Generic[T]):
 
     def __init__(self, session: Session) -> None:
         self.db = session
+        self._by_id: Optional[Select] = None
+
+    # Leitura sem ORM: `select()` do Core direto na tabela mapeada, sem
+    # identity map nem estado de instância. Cada `Row` tem os atributos
+    # das colunas e vai direto para o serializer do modelo (`to_dict`);
+    # instâncias mapeadas ficam para as escritas.
+
+    @property
+    def table(self) -> Table:
+        return inspect(self.model).local_table  # type: ignore
+
+    def read_by_id(self, id: int) -> Optional[Row]:
+        if self._by_id is None:
+            self._by_id = select(self.table).where(self.table.c._id == bindparam('id'))
+        return self.db.connection().execute(self._by_id, {'id': id}).first()
+
+    def read_by(self, **kwargs) -> Optional[Row]:
+        statement = select(self.table).filter_by(**kwargs).limit(1)
+        return self.db.connection().execute(statement).first()
+
+    def iter_all(self, batch_size: int = 500) -> Iterator[Row]:
+        """
+        Todas as linhas da tabela, buscadas do banco em lotes de `batch_size`.
+        O `yield_per` vale só para este statement; o cursor é fechado ao fim
+        da iteração ou quando o iterador é fechado (cliente desconectou).
+        """
+        statement = (
+            select(self.table)
+            .order_by(self.table.c._id)
+            .execution_options(yield_per=batch_size)
+        )
+        return self._stream(self.db.connection().execute(statement))
+
+    @staticmethod
+    def _stream(result: Result) -> Iterator[Row]:
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    def to_dict(self, row: Row) -> Dict[str, Any]:
+        return self.model.serializer()(row)  # type: ignore
+
+    def version(self, row: Row) -> str:
+        """Versão da linha para o ETag, sem passar pelo serializer nem pelo codec."""
+        return hashlib.blake2b(repr(tuple(row)).encode(), digest_size=8).hexdigest()
 
     def get_by_id(self, user_id: int) -> Optional[T]:
         return self.db.query(self.model).filter_by(_id=user_id).first()
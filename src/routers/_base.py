@@ -1,9 +1,15 @@
 from abc import ABC
-import re
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import logging
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
 
 from src.exceptions.http import MethodNotAllowedError
+from src.models import Response
 from src.utils import ENDPOINT_DATA, Route, make_response
+from ._matcher import BaseMatcher, StaticRoutes, get_matcher_class
+from ._table import RouteTable
+
+
+logger = logging.getLogger(__name__)
 
 
 MatchResult = Tuple[
@@ -11,9 +17,37 @@ MatchResult = Tuple[
     Optional[Dict[str, Any]]
 ]
 
+
+class AllowedMethods:
+    """
+    Conjunto de métodos de um template de rota, com o header `Allow` e os
+    headers do 405 e do OPTIONS montados uma única vez. Cada OPTIONS
+    recebe uma `Response` nova, que middlewares podem alterar.
+    """
+
+    __slots__ = ('methods', 'allow', 'headers', 'options_headers')
+
+    def __init__(self, methods: FrozenSet[str]) -> None:
+        self.methods = methods
+        self.allow = ", ".join(sorted(methods | {"OPTIONS"}))
+        self.headers = {"Allow": self.allow}
+        self.options_headers = (("Allow", self.allow), ("Content-Length", "0"))
+
+    async def options_handler(self, *args, **kwargs) -> Response:
+        return make_response(204, None, dict(self.options_headers))
+
+
 class BaseRouter(ABC):
 
     routes: List[Dict[str, Any]]
+    matcher: Optional[BaseMatcher] = None
+    engine: str = 'trie'
+    static_routes: StaticRoutes = StaticRoutes()
+    allowed_index: Dict[FrozenSet[str], AllowedMethods]
+
+    # O resultado de `match_dynamic` depende só de (método, path) e pode
+    # ficar no `RouteCache` da aplicação
+    cacheable: bool = True
 
     def match_route(
         self,
@@ -21,47 +55,104 @@ class BaseRouter(ABC):
         request_path: str
     ) -> MatchResult:
 
-        allowed_methods = set()
-        method_not_allowed = False                        
-        for item in self.routes:
-            endpoint_method = item['method']
-            endpoint_route = item['route']
-            endpoint_controller = item['controller']
+        handler = self.static_routes.get(request_method, request_path)
+        if handler is not None:
+            return handler, {}
+
+        return self.match_dynamic(request_method, request_path)
+
+    def match_dynamic(
+        self,
+        request_method: str,
+        request_path: str
+    ) -> MatchResult:
+
+        matcher = self.matcher or self.build_matcher()
+        endpoint_controller, m, allowed_methods = matcher.lookup(
+            request_method, request_path
+        )
+        if endpoint_controller is not None:
+            return endpoint_controller, m
+
+        if not allowed_methods:
+            return None, None
 
-            if (m := endpoint_route.match(request_path)) is not None:
-                allowed_methods.add(endpoint_method)
-                if endpoint_method != request_method:
-                    method_not_allowed = True
-                    continue
-                return endpoint_controller, m
+        allowed = self.allowed_index.get(allowed_methods)
+        if allowed is None:
+            allowed = self.allowed_index[allowed_methods] = AllowedMethods(
+                allowed_methods
+            )
 
         if request_method == "OPTIONS":
-            return self.__get_options_handler(allowed_methods), {}
+            return allowed.options_handler, {}
+
+        raise MethodNotAllowedError(headers=allowed.headers)
+
+    def build_matcher(self) -> BaseMatcher:
+        routes = getattr(self, 'routes', None) or []
+        matcher_class = get_matcher_class(self.engine)
+        self.matcher = matcher_class(routes)
+
+        templates: Dict[str, set] = {}
+        for item in routes:
+            templates.setdefault(item['route'].pattern.pattern, set()).add(item['method'])
 
-        if method_not_allowed:
-            raise MethodNotAllowedError
+        self.allowed_index = {}
+        for methods in templates.values():
+            key = frozenset(methods)
+            if key not in self.allowed_index:
+                self.allowed_index[key] = AllowedMethods(key)
 
-        return None, None
+        return self.matcher
+
+    def use_engine(self, engine: str) -> BaseMatcher:
+        get_matcher_class(engine)
+        self.engine = engine
+        return self.build_matcher()
 
     def register_endpoint(self, func, controller):
         url_prefix = str(getattr(controller, 'url_prefix', None) or '').rstrip('/')
         endpoint_data = getattr(func, ENDPOINT_DATA)
         method = endpoint_data['method']
         endpoint_pattern = endpoint_data['pattern']
+        self.add_route(method, url_prefix + endpoint_pattern, func)
+        return endpoint_data
 
+    def add_route(self, method: str, path: str, func: Callable) -> Route:
         if not getattr(self, 'routes', None):
             self.routes = []
+            self.static_routes = StaticRoutes()
 
-        r = Route(url_prefix + endpoint_pattern, method)
-        print(r)
+        r = Route(path, func)
         self.routes.append({'method': method, 'route': r, 'controller': func})
-        return endpoint_data
+        if not r.param_names:
+            self.static_routes.add(method, r.path, func)
+        self.matcher = None
+        return r
 
     def register_endpoints(self, endpoints: Union[tuple, list], controller):
         for endpoint in endpoints:
             self.register_endpoint(endpoint, controller)
 
-    def register_controller(self, controller: Any):
+    def register_controller(self, controller: Any, route_table: Optional[RouteTable] = None):
+        """
+        Registra os endpoints de `controller`. Com `route_table` (carregada
+        de arquivo) os nomes vêm dela em vez de `dir(controller)`, desde
+        que o módulo do controller não tenha mudado desde a gravação.
+        """
+
+        if route_table is not None:
+            names = route_table.endpoints_for(controller)
+            if names:
+                methods = [getattr(controller, name, None) for name in names]
+                if all(getattr(m, ENDPOINT_DATA, None) for m in methods):
+                    self.register_endpoints(methods, controller)
+                    return
+                logger.warning(
+                    f'Tabela de rotas desatualizada para '
+                    f'{controller.__class__.__qualname__}, refazendo introspecção'
+                )
+
         methods = []
         for attr in dir(controller):
             if attr.startswith("_"):
@@ -74,17 +165,37 @@ class BaseRouter(ABC):
 
         self.register_endpoints(methods, controller)
 
-    def __get_options_handler(self, allowed_methods):
-        async def endpoint_handler(*args, **kwargs):
-            methods = sorted(allowed_methods | {"OPTIONS"})
-            return make_response(204, None, {
-                "Allow": ", ".join(methods),
-                "Content-Length": "0",
-            })
-
-        return endpoint_handler
-
 
 class APIRouter(BaseRouter):
-    def __init__(self, controller):
-        self.register_controller(controller)
+    def __init__(self, controller, route_table: Optional[RouteTable] = None):
+        self.register_controller(controller, route_table)
+
+
+class RawRouter(BaseRouter):
+    """
+    Rotas "raw": handlers que recebem o scope e o protocol RSGI direto,
+    sem Request, middlewares ou serialização. Um path que não casa (ou
+    casa com outro método) segue para o pipeline normal.
+    """
+
+    def __init__(self) -> None:
+        self.routes = []
+        self.static_routes = StaticRoutes()
+        self.dynamic = False
+
+    def add_route(self, method: str, path: str, func: Callable) -> Route:
+        r = super().add_route(method, path, func)
+        self.dynamic = self.dynamic or bool(r.param_names)
+        return r
+
+    def match_raw(self, request_method: str, request_path: str) -> MatchResult:
+        handler = self.static_routes.routes.get((request_method, request_path))
+        if handler is not None:
+            return handler, {}
+
+        if not self.dynamic:
+            return None, None
+
+        matcher = self.matcher or self.build_matcher()
+        handler, args, _ = matcher.lookup(request_method, request_path)
+        return handler, args
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.exceptions.http import HTTPException
+
+
+CacheEntry = Tuple[
+    Optional[Callable],
+    Optional[Dict[str, Any]],
+    Optional[HTTPException],
+    bool
+]
+
+MUTABLE_TYPES = (list, dict)
+
+
+def make_entry(
+    handler: Optional[Callable],
+    args: Optional[Dict[str, Any]],
+    error: Optional[HTTPException] = None
+) -> CacheEntry:
+    mutable = args is not None and any(isinstance(v, MUTABLE_TYPES) for v in args.values())
+    return handler, args, error, mutable
+
+
+def clone_error(error: HTTPException) -> HTTPException:
+    fresh = Exception.__new__(type(error))
+    fresh.__dict__.update(vars(error))
+    fresh.args = error.args
+    return fresh
+
+
+def resolve_entry(entry: CacheEntry) -> Tuple[Callable, Dict[str, Any]]:
+    """
+    Handler e argumentos de uma entrada, sem compartilhar estado entre
+    requests: valores `list`/`dict` são copiados e o erro cacheado é
+    relançado como uma nova instância (sem traceback/contexto anteriores).
+    """
+
+    handler, args, error, mutable = entry
+    if error is not None:
+        raise clone_error(error)
+    if mutable:
+        args = {
+            key: deepcopy(value) if isinstance(value, MUTABLE_TYPES) else value
+            for key, value in args.items()  # type: ignore
+        }
+    return handler, dict(args)  # type: ignore
+
+
+class RouteCache:
+    """
+    LRU limitado de resultados de roteamento, indexado por (método, path).
+    Guarda o handler com os argumentos já convertidos, ou o erro (404/405)
+    quando o path não resolve, para que paths repetidos não passem pelos
+    matchers. Cada hit recebe cópias próprias via `resolve_entry`.
+    Assume que o resultado depende só de (método, path): routers e mounts
+    cujo conteúdo muda em runtime (ex.: `StaticFiles`) declaram
+    `cacheable = False` e os paths que passam por eles não são cacheados.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError('maxsize deve ser maior que zero')
+
+        self.maxsize = maxsize
+        self.entries: 'OrderedDict[Tuple[str, str], CacheEntry]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, method: str, path: str) -> Optional[CacheEntry]:
+        key = (method, path)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, method: str, path: str, entry: CacheEntry) -> None:
+        self.entries[(method, path)] = entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
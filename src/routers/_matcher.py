@@ -0,0 +1,289 @@
+from abc import ABC, abstractmethod
+import re
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from src.utils import Route
+
+
+Endpoint = Tuple[Callable, Route]
+
+LookupResult = Tuple[
+    Optional[Callable],
+    Optional[Dict[str, Any]],
+    FrozenSet[str]
+]
+
+NO_METHODS: FrozenSet[str] = frozenset()
+
+
+class BaseMatcher(ABC):
+
+    def __init__(self, routes: List[Dict[str, Any]]) -> None:
+        self.routes = routes
+        self.build(routes)
+
+    @abstractmethod
+    def build(self, routes: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lookup(self, request_method: str, request_path: str) -> LookupResult:
+        """Retorna (handler, args, métodos permitidos) para o path."""
+        raise NotImplementedError
+
+    @staticmethod
+    def merge_methods(allowed: List[FrozenSet[str]]) -> FrozenSet[str]:
+        if not allowed:
+            return NO_METHODS
+        if len(allowed) == 1:
+            return allowed[0]
+        return frozenset().union(*allowed)
+
+
+class StaticRoutes:
+    """
+    Tabela hash para rotas sem placeholders, indexada por (método, path).
+    Resolve essas rotas com um único lookup, antes de qualquer regex.
+    """
+
+    __slots__ = ('routes', 'hits', 'misses')
+
+    def __init__(self) -> None:
+        self.routes: Dict[Tuple[str, str], Callable] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, method: str, path: str, handler: Callable) -> None:
+        self.routes.setdefault((method, path), handler)
+
+    def update(self, other: 'StaticRoutes') -> None:
+        for key, handler in other.routes.items():
+            self.routes.setdefault(key, handler)
+
+    def get(self, method: str, path: str) -> Optional[Callable]:
+        handler = self.routes.get((method, path))
+        if handler is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return handler
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'routes': len(self.routes),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+class _TrieNode:
+
+    __slots__ = ('static', 'dynamic', 'endpoints', 'methods')
+
+    def __init__(self) -> None:
+        self.static: Dict[str, _TrieNode] = {}
+        self.dynamic: List[Tuple[re.Pattern, _TrieNode]] = []
+        self.endpoints: Dict[str, Tuple[Endpoint, int]] = {}
+        self.methods: FrozenSet[str] = NO_METHODS
+
+    def child(self, segment: Any) -> '_TrieNode':
+        if isinstance(segment, str):
+            node = self.static.get(segment)
+            if node is None:
+                node = self.static[segment] = _TrieNode()
+            return node
+
+        for pattern, node in self.dynamic:
+            if pattern.pattern == segment.pattern:
+                return node
+
+        node = _TrieNode()
+        self.dynamic.append((segment, node))
+        return node
+
+
+class TrieMatcher(BaseMatcher):
+    """
+    Árvore de segmentos: segmentos estáticos são resolvidos por lookup em
+    dict e placeholders tipados viram arestas testadas com `fullmatch`.
+    O custo depende da profundidade do path, não da quantidade de rotas.
+    Segmentos estáticos têm prioridade sobre placeholders; entre arestas
+    de placeholders vence a rota registrada primeiro, como nas outras engines.
+    """
+
+    def build(self, routes: List[Dict[str, Any]]) -> None:
+        self.root = _TrieNode()
+        for index, item in enumerate(routes):
+            route: Route = item['route']
+            node = self.root
+            for segment in route.segments:
+                node = node.child(segment)
+            node.endpoints.setdefault(item['method'], ((item['controller'], route), index))
+            node.methods = frozenset(node.endpoints)
+
+    def lookup(self, request_method: str, request_path: str) -> LookupResult:
+        allowed_methods: List[FrozenSet[str]] = []
+        found = self._search(
+            self.root,
+            request_path.split('/'),
+            0,
+            (),
+            request_method,
+            allowed_methods
+        )
+
+        if found is None:
+            return None, None, self.merge_methods(allowed_methods)
+
+        ((handler, route), _), values = found
+        return handler, route.convert(values), NO_METHODS
+
+    def _search(
+        self,
+        node: _TrieNode,
+        segments: List[str],
+        index: int,
+        values: Tuple[str, ...],
+        request_method: str,
+        allowed_methods: List[FrozenSet[str]]
+    ) -> Optional[Tuple[Tuple[Endpoint, int], Tuple[str, ...]]]:
+
+        if index == len(segments):
+            endpoint = node.endpoints.get(request_method)
+            if endpoint is not None:
+                return endpoint, values
+            if node.methods:
+                allowed_methods.append(node.methods)
+            return None
+
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._search(
+                child, segments, index + 1, values,
+                request_method, allowed_methods
+            )
+            if found is not None:
+                return found
+
+        best = None
+        for pattern, child in node.dynamic:
+            matched = pattern.fullmatch(segment)
+            if matched is None:
+                continue
+            found = self._search(
+                child, segments, index + 1, values + matched.groups(),
+                request_method, allowed_methods
+            )
+            if found is not None and (best is None or found[0][1] < best[0][1]):
+                best = found
+
+        return best
+
+
+class LinearMatcher(BaseMatcher):
+    """Percorre as rotas na ordem de registro, testando cada regex."""
+
+    def build(self, routes: List[Dict[str, Any]]) -> None:
+        templates: Dict[str, set] = {}
+        for item in routes:
+            templates.setdefault(item['route'].pattern.pattern, set()).add(item['method'])
+
+        methods = {pattern: frozenset(m) for pattern, m in templates.items()}
+        self.endpoints = [
+            (
+                item['method'],
+                item['route'],
+                item['controller'],
+                methods[item['route'].pattern.pattern]
+            )
+            for item in routes
+        ]
+
+    def lookup(self, request_method: str, request_path: str) -> LookupResult:
+        allowed_methods: List[FrozenSet[str]] = []
+        for method, route, handler, methods in self.endpoints:
+            if (m := route.match(request_path)) is not None:
+                if method != request_method:
+                    if methods not in allowed_methods:
+                        allowed_methods.append(methods)
+                    continue
+                return handler, m, NO_METHODS
+
+        return None, None, self.merge_methods(allowed_methods)
+
+
+class RegexMatcher(BaseMatcher):
+    """
+    Compila todas as rotas do router numa única regex de alternação. Cada
+    template termina num grupo nomeado vazio, identificado por `lastgroup`,
+    então descobrir o template é uma única varredura em C. Os grupos dos
+    placeholders viram não-capturantes na alternação (grupos capturantes
+    em cada alternativa deixam o `re` dezenas de vezes mais lento) e os
+    valores são extraídos depois pela regex do próprio template.
+    """
+
+    def build(self, routes: List[Dict[str, Any]]) -> None:
+        templates: Dict[str, Dict[str, Endpoint]] = {}
+        for item in routes:
+            route: Route = item['route']
+            endpoints = templates.setdefault(route.pattern.pattern, {})
+            endpoints.setdefault(item['method'], (item['controller'], route))
+
+        self.groups: List[
+            Tuple[Dict[str, Endpoint], FrozenSet[str], re.Pattern]
+        ] = []
+        self.names: Dict[str, int] = {}
+        alternatives = []
+        for i, (pattern, endpoints) in enumerate(templates.items()):
+            route = next(iter(endpoints.values()))[1]
+            name = f'_r{i}'
+            self.names[name] = len(self.groups)
+            self.groups.append((endpoints, frozenset(endpoints), route.pattern))
+            body = re.sub(r'(?<!\\)\((?!\?)', '(?:', pattern[1:-1])
+            alternatives.append(f'{body}(?P<{name}>)')
+
+        self.pattern = re.compile(f"^(?:{'|'.join(alternatives)})$")
+
+    def lookup(self, request_method: str, request_path: str) -> LookupResult:
+        matched = self.pattern.match(request_path)
+        if matched is None or matched.lastgroup is None:
+            return None, None, NO_METHODS
+
+        index = self.names[matched.lastgroup]
+        endpoints, methods, _ = self.groups[index]
+        endpoint = endpoints.get(request_method)
+        if endpoint is not None:
+            return self._result(endpoint, request_path)
+
+        allowed_methods = [methods]
+        for endpoints, methods, pattern in self.groups[index + 1:]:
+            if pattern.match(request_path) is None:
+                continue
+            endpoint = endpoints.get(request_method)
+            if endpoint is not None:
+                return self._result(endpoint, request_path)
+            allowed_methods.append(methods)
+
+        return None, None, self.merge_methods(allowed_methods)
+
+    @staticmethod
+    def _result(endpoint: Endpoint, request_path: str) -> LookupResult:
+        handler, route = endpoint
+        if not route.param_names:
+            return handler, {}, NO_METHODS
+        return handler, route.match(request_path), NO_METHODS
+
+
+ENGINES: Dict[str, Type[BaseMatcher]] = {
+    'linear': LinearMatcher,
+    'trie': TrieMatcher,
+    'regex': RegexMatcher,
+}
+
+
+def get_matcher_class(engine: str) -> Type[BaseMatcher]:
+    try:
+        return ENGINES[engine]
+    except KeyError:
+        raise ValueError(f"Engine de rotas desconhecida: {engine}")
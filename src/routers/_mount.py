@@ -0,0 +1,106 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.exceptions.http import NotFoundError
+from ._matcher import StaticRoutes
+
+
+def first_segment(path: str) -> str:
+    end = path.find('/', 1)
+    return path[1:end] if end != -1 else path[1:]
+
+
+def router_segment(router: Any) -> Optional[str]:
+    """Primeiro segmento comum a todas as rotas do router, se houver."""
+
+    if isinstance(router, Mount):
+        return first_segment(router.prefix) if router.prefix else None
+
+    segments = set()
+    for item in getattr(router, 'routes', None) or []:
+        route_segments = item['route'].segments
+        if len(route_segments) < 2 or not isinstance(route_segments[1], str):
+            return None
+        segments.add(route_segments[1])
+
+    return segments.pop() if len(segments) == 1 else None
+
+
+def all_cacheable(routers: Sequence[Any]) -> bool:
+    return all(getattr(router, 'cacheable', True) for router in routers)
+
+
+class Mount:
+    """
+    Sub-aplicação montada sob um prefixo, ex.: `app.mount('/api/v2', v2)`.
+    O path é repassado sem o prefixo para `resolve_route` da sub-aplicação;
+    os handlers dela rodam no pipeline (middlewares) da aplicação pai.
+    """
+
+    def __init__(self, prefix: str, app: Any) -> None:
+        prefix = prefix.strip('/')
+        self.prefix = '/' + prefix if prefix else ''
+        self.app = app
+        self.static_routes = StaticRoutes()
+        static_routes = getattr(app, 'static_routes', None)
+        for (method, path), handler in (static_routes.routes.items() if static_routes else ()):
+            self.static_routes.add(method, self.prefix + path, handler)
+
+    def __repr__(self) -> str:
+        return f'Mount(prefix="{self.prefix}", app={self.app.__class__.__name__})'
+
+    @property
+    def cacheable(self) -> bool:
+        return getattr(self.app, 'cacheable', True)
+
+    def match_dynamic(self, request_method: str, request_path: str):
+        if not request_path.startswith(self.prefix):
+            return None, None
+
+        rest = request_path[len(self.prefix):]
+        if rest and rest[0] != '/':
+            return None, None
+
+        try:
+            return self.app.resolve_route(request_method, rest or '/')
+        except NotFoundError:
+            return None, None
+
+
+class MountTable:
+    """
+    Particiona routers e mounts pelo primeiro segmento do path, para que
+    cada request consulte só quem pode atendê-la. Routers sem um prefixo
+    único são consultados para qualquer path, mantendo a ordem original.
+    Também indica, por partição, se o resultado do roteamento pode ir
+    para o `RouteCache`: só quando todos os candidatos são `cacheable`.
+    """
+
+    def __init__(self, routers: Sequence[Any]) -> None:
+        keys = [router_segment(router) for router in routers]
+        self.fallback: Tuple[Any, ...] = tuple(
+            router for router, key in zip(routers, keys) if key is None
+        )
+        self.partitions: Dict[str, Tuple[Any, ...]] = {}
+        for key in set(k for k in keys if k is not None):
+            self.partitions[key] = tuple(
+                router for router, k in zip(routers, keys)
+                if k is None or k == key
+            )
+
+        self.fallback_cacheable = all_cacheable(self.fallback)
+        self.cacheable_partitions: Dict[str, bool] = {
+            key: all_cacheable(routers) for key, routers in self.partitions.items()
+        }
+        self.all_cacheable = all_cacheable(routers)
+
+    def candidates(self, path: str) -> Tuple[Any, ...]:
+        return self.partitions.get(first_segment(path), self.fallback)
+
+    def cacheable(self, path: str) -> bool:
+        return self.cacheable_partitions.get(first_segment(path), self.fallback_cacheable)
+
+    def stats(self) -> Dict[str, List[str]]:
+        return {
+            key: [router.__class__.__name__ for router in routers]
+            for key, routers in self.partitions.items()
+        }
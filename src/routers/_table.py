@@ -0,0 +1,274 @@
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+ROUTE_TABLE_VERSION = 2
+
+# Placeholders que aceitam qualquer segmento não vazio
+_CATCH_ALL = {r"([^/]+)", r"((?:[^/]+,)*[^/]+)"}
+
+
+def source_signature(cls: type) -> List[Any]:
+    """
+    (arquivo, mtime, tamanho) dos módulos que definem `cls` e suas bases:
+    se algum muda, os endpoints salvos para o controller estão desatualizados.
+    """
+
+    signature: List[Any] = []
+    for klass in cls.__mro__[:-1]:
+        path = getattr(sys.modules.get(klass.__module__), '__file__', None)
+        if not path or path in signature:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        signature += [path, st.st_mtime_ns, st.st_size]
+
+    return signature
+
+
+@dataclass(frozen=True)
+class RouteEntry:
+    method: str
+    path: str
+    router: str
+    controller: str
+    endpoint: str
+    handler: Optional[Callable] = field(default=None, compare=False, repr=False)
+    segments: Tuple[Union[str, re.Pattern], ...] = field(
+        default=(), compare=False, repr=False
+    )
+
+    def to_row(self) -> List[str]:
+        return [self.method, self.path, self.router, self.controller, self.endpoint]
+
+
+class RouteTable:
+    """
+    Tabela imutável com todas as rotas da aplicação, na ordem de resolução.
+    Detecta rotas em conflito (mesmo método e template) e rotas que nunca
+    são alcançadas porque uma rota anterior cobre todos os seus paths.
+    Pode ser gravada em arquivo e recarregada, evitando a introspecção dos
+    controllers no boot dos workers; a assinatura dos módulos de cada
+    controller (`sources`) invalida as entradas cujo código mudou.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[RouteEntry],
+        engine: str = 'trie',
+        sources: Optional[Dict[str, List[Any]]] = None
+    ) -> None:
+
+        self.entries: Tuple[RouteEntry, ...] = tuple(entries)
+        self.engine = engine
+        self.sources: Dict[str, List[Any]] = sources or {}
+        self.conflicts: Tuple[Tuple[RouteEntry, RouteEntry], ...] = ()
+        self.shadowed: Tuple[Tuple[RouteEntry, RouteEntry], ...] = ()
+        if any(entry.segments for entry in self.entries):
+            self.conflicts, self.shadowed = self._analyze()
+
+    @classmethod
+    def build(cls, routers: Sequence[Any], engine: str = 'trie') -> 'RouteTable':
+        entries = []
+        sources: Dict[str, List[Any]] = {}
+        for router in routers:
+            for item in getattr(router, 'routes', None) or []:
+                handler = item['controller']
+                route = item['route']
+                # handlers de `add_route` podem ser funções sem controller
+                owner = getattr(handler, '__self__', None)
+                if owner is not None:
+                    controller, endpoint = owner.__class__.__qualname__, handler.__name__
+                    if controller not in sources:
+                        sources[controller] = source_signature(owner.__class__)
+                else:
+                    controller = getattr(handler, '__module__', None) or ''
+                    endpoint = getattr(handler, '__qualname__', None) or repr(handler)
+                entries.append(RouteEntry(
+                    method=item['method'],
+                    path=route.path,
+                    router=router.__class__.__name__,
+                    controller=controller,
+                    endpoint=endpoint,
+                    handler=handler,
+                    segments=route.segments
+                ))
+
+        return cls(entries, engine, sources)
+
+    def __iter__(self) -> Iterator[RouteEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return f'RouteTable(routes={len(self.entries)}, engine="{self.engine}")'
+
+    def find(self, method: Optional[str] = None, path: Optional[str] = None) -> List[RouteEntry]:
+        return [
+            entry for entry in self.entries
+            if (method is None or entry.method == method)
+            and (path is None or entry.path == path)
+        ]
+
+    def endpoints_for(self, controller: Any) -> Optional[List[str]]:
+        qualname = controller.__class__.__qualname__
+        if self.sources.get(qualname) != source_signature(controller.__class__):
+            return None
+
+        names: List[str] = []
+        for entry in self.entries:
+            if entry.controller == qualname and entry.endpoint not in names:
+                names.append(entry.endpoint)
+
+        return names or None
+
+    def report(self) -> None:
+        for first, second in self.conflicts:
+            logger.warning(
+                f'Rota em conflito: {second.method} {second.path} '
+                f'({second.controller}.{second.endpoint}) já registrada por '
+                f'{first.controller}.{first.endpoint}'
+            )
+        for first, second in self.shadowed:
+            logger.warning(
+                f'Rota inalcançável: {second.method} {second.path} '
+                f'({second.controller}.{second.endpoint}) é coberta por '
+                f'{first.method} {first.path} ({first.controller}.{first.endpoint})'
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': ROUTE_TABLE_VERSION,
+            'engine': self.engine,
+            'routes': [entry.to_row() for entry in self.entries],
+            'sources': self.sources,
+        }
+
+    def dump(self, file_path: str) -> None:
+        content = json.dumps(self.to_dict(), separators=(',', ':'))
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'RouteTable':
+        with open(file_path) as f:
+            content = json.load(f)
+
+        if content.get('version') != ROUTE_TABLE_VERSION:
+            raise ValueError(f"Versão de tabela de rotas inválida: {file_path}")
+
+        entries = [RouteEntry(*row) for row in content['routes']]
+        return cls(entries, content.get('engine', 'trie'), content.get('sources'))
+
+    @classmethod
+    def read(cls, file_path: str) -> Optional['RouteTable']:
+        """Como `load`, mas devolve None se o arquivo não existe ou é inválido."""
+
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return cls.load(file_path)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.warning(f'Tabela de rotas ignorada ({file_path}): {error}')
+            return None
+
+    def sync(self, file_path: str, saved: Optional['RouteTable'] = None) -> bool:
+        """
+        Grava a tabela em `file_path` se `saved` (o conteúdo lido do arquivo)
+        não existe ou difere dela. Devolve se o arquivo foi regravado.
+        """
+
+        if saved is not None:
+            if saved.to_dict() == self.to_dict():
+                return False
+            logger.warning(f'Tabela de rotas desatualizada, regravando {file_path}')
+
+        self.dump(file_path)
+        return True
+
+    def _analyze(self) -> Tuple[
+        Tuple[Tuple[RouteEntry, RouteEntry], ...],
+        Tuple[Tuple[RouteEntry, RouteEntry], ...]
+    ]:
+        conflicts = []
+        shadowed = []
+        seen: Dict[Tuple[str, Tuple[str, ...]], RouteEntry] = {}
+
+        # Candidatas a cobrir uma rota: mesmo método e mesma profundidade,
+        # separadas pelo primeiro segmento (estático ou placeholder)
+        static_buckets: Dict[Tuple[str, int, str], List[RouteEntry]] = {}
+        dynamic_buckets: Dict[Tuple[str, int], List[RouteEntry]] = {}
+
+        for entry in self.entries:
+            template = self._template_key(entry)
+            first = seen.get((entry.method, template))
+            if first is not None:
+                conflicts.append((first, entry))
+                continue
+            seen[(entry.method, template)] = entry
+
+            depth = len(entry.segments)
+            head = entry.segments[1] if depth > 1 else ''
+            candidates = dynamic_buckets.get((entry.method, depth), [])
+            if isinstance(head, str):
+                candidates = static_buckets.get((entry.method, depth, head), []) + candidates
+
+            for previous in candidates:
+                if self._covers(previous, entry):
+                    shadowed.append((previous, entry))
+                    break
+
+            if isinstance(head, str):
+                static_buckets.setdefault((entry.method, depth, head), []).append(entry)
+            else:
+                dynamic_buckets.setdefault((entry.method, depth), []).append(entry)
+
+        return tuple(conflicts), tuple(shadowed)
+
+    @staticmethod
+    def _template_key(entry: RouteEntry) -> Tuple[str, ...]:
+        return tuple(
+            segment if isinstance(segment, str) else segment.pattern
+            for segment in entry.segments
+        )
+
+    def _covers(self, first: RouteEntry, second: RouteEntry) -> bool:
+        """Indica se todo path aceito por `second` também é aceito por `first`."""
+
+        if not any(not isinstance(s, str) for s in second.segments):
+            # Rotas estáticas são resolvidas antes de qualquer matcher
+            return False
+
+        if len(first.segments) != len(second.segments):
+            return False
+
+        static_first = self.engine == 'trie' and first.router == second.router
+        for a, b in zip(first.segments, second.segments):
+            if isinstance(b, str):
+                if isinstance(a, str):
+                    if a != b:
+                        return False
+                elif static_first or a.fullmatch(b) is None:
+                    return False
+            elif isinstance(a, str):
+                return False
+            elif a.pattern != b.pattern and a.pattern not in _CATCH_ALL:
+                return False
+
+        return True
@@ -1,13 +1,14 @@
-from typing import Any
+from typing import Any, Optional
 
 from src.controllers.auth import AuthService
 from ._base import BaseRouter
+from ._table import RouteTable
 from src.controllers import AuthController
 from src.repository import PacienteRepository
 
 class AuthRouter(BaseRouter):
-    def __init__(self, session: Any):
+    def __init__(self, session: Any, route_table: Optional[RouteTable] = None):
         repository = PacienteRepository(session)
         service = AuthService(repository)
         controller = AuthController(service)
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
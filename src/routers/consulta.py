@@ -1,10 +1,11 @@
-from typing import Any
+from typing import Any, Optional
 from ._base import BaseRouter
+from ._table import RouteTable
 from src.controllers import ConsultaController
 from src.repository import ConsultaRepository
 
 class ConsultaRouter(BaseRouter):
-    def __init__(self, session: Any):
+    def __init__(self, session: Any, route_table: Optional[RouteTable] = None):
         repository = ConsultaRepository(session)
         controller = ConsultaController(repository)
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
@@ -4,7 +4,7 @@ from src.repository import DoencaRepository
 
 
 class DoencaRouter(BaseRouter):
-    def __init__(self, session):
+    def __init__(self, session, route_table=None):
         repository = DoencaRepository(session)
         controller = DoencaController(repository)
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
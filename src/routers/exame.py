@@ -4,7 +4,7 @@ from src.repository import ExameRepository
 
 
 class ExameRouter(BaseRouter):
-    def __init__(self, session):
+    def __init__(self, session, route_table=None):
         repository = ExameRepository(session)
         controller = ExameController(repository)
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
@@ -4,7 +4,7 @@ from src.repository import PacienteRepository
 
 
 class PacienteRouter(BaseRouter):
-    def __init__(self, session):
+    def __init__(self, session, route_table=None):
         repository = PacienteRepository(session)
         controller = PacienteController(repository)
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
@@ -4,7 +4,7 @@ from src.repository import TarefaRepository
 
 
 class TarefaRouter(BaseRouter):
-    def __init__(self, session):
+    def __init__(self, session, route_table=None):
         repository = TarefaRepository(session)
         controller = TarefaController(repository)
-        self.register_controller(controller)
\ No newline at end of file
+        self.register_controller(controller, route_table)
\ No newline at end of file
@@ -3,6 +3,6 @@ from src.controllers import TesteController
 
 
 class TesteRouter(BaseRouter):
-    def __init__(self):
+    def __init__(self, route_table=None):
         controller = TesteController()
-        self.register_controller(controller)
+        self.register_controller(controller, route_table)
@@ -0,0 +1,184 @@
+from contextlib import suppress
+from email.utils import formatdate
+import mimetypes
+import os
+import stat
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.exceptions.http import MethodNotAllowedError, NotFoundError
+from src.middlewares import negotiate_encoding
+from src.models import FileResponse, Request, Response
+from src.utils import etag_matches, not_modified
+
+
+class StaticFile:
+    """Metadados de um arquivo servido, calculados uma única vez."""
+
+    __slots__ = (
+        'path', 'headers', 'etag', 'gzip_path', 'gzip_headers', 'gzip_etag',
+        'signature', 'checked'
+    )
+
+    def __init__(
+        self,
+        path: str,
+        st: os.stat_result,
+        gzip_path: Optional[str],
+        signature: Tuple[Any, ...] = ()
+    ) -> None:
+
+        content_type, _ = mimetypes.guess_type(path)
+        self.path = path
+        self.signature = signature
+        self.checked = time.monotonic()
+        self.etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        self.headers = {
+            'content-type': content_type or 'application/octet-stream',
+            'content-length': str(st.st_size),
+            'etag': self.etag,
+            'last-modified': formatdate(st.st_mtime, usegmt=True),
+        }
+
+        self.gzip_path = gzip_path
+        self.gzip_headers: Dict[str, str] = {}
+        self.gzip_etag = ''
+        if gzip_path is not None:
+            gz = os.stat(gzip_path)
+            self.gzip_etag = f'"{gz.st_mtime_ns:x}-{gz.st_size:x}-gz"'
+            self.gzip_headers = dict(
+                self.headers,
+                **{
+                    'content-length': str(gz.st_size),
+                    'content-encoding': 'gzip',
+                    'etag': self.gzip_etag,
+                    'vary': 'accept-encoding',
+                }
+            )
+            self.headers['vary'] = 'accept-encoding'
+
+
+def file_signature(path: str, gzip: bool) -> Optional[Tuple[Any, ...]]:
+    """(mtime, tamanho) do arquivo e do `.gz` ao lado; `None` se o arquivo sumiu."""
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    gz = None
+    if gzip:
+        with suppress(OSError):
+            gz_st = os.stat(path + '.gz')
+            gz = (gz_st.st_mtime_ns, gz_st.st_size)
+    return (st.st_mtime_ns, st.st_size, gz)
+
+
+class StaticFiles:
+    """
+    Serve os arquivos de `directory`; para uso com `App.mount`, ex.:
+    `app.mount('/static', StaticFiles('public'))`. O stat e o ETag de cada
+    arquivo ficam em cache (até `cache_size` entradas) e são revalidados
+    com um novo `stat` a cada `ttl` segundos: se mtime/tamanho mudaram a
+    entrada é recalculada, e arquivos removidos saem do cache. Com
+    `gzip=True`, um `arquivo.gz` ao lado do original é enviado a clientes
+    que aceitam gzip. Paths sob o mount nunca entram no `RouteCache`.
+    """
+
+    ALLOWED_METHODS = ('GET', 'HEAD')
+
+    # O resultado muda com o disco: o `RouteCache` do App não pode guardá-lo
+    cacheable = False
+
+    def __init__(
+        self,
+        directory: str,
+        gzip: bool = True,
+        index: Optional[str] = 'index.html',
+        cache_size: int = 1024,
+        ttl: float = 1.0
+    ) -> None:
+
+        self.directory = os.path.realpath(directory)
+        self.gzip = gzip
+        self.index = index
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.files: Dict[str, StaticFile] = {}
+
+    def __repr__(self) -> str:
+        return f'StaticFiles(directory="{self.directory}")'
+
+    def clear(self) -> None:
+        self.files.clear()
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        entry = self.files.get(path)
+        if entry is not None:
+            now = time.monotonic()
+            if now - entry.checked < self.ttl:
+                return entry
+            if file_signature(entry.path, self.gzip) == entry.signature:
+                entry.checked = now
+                return entry
+            del self.files[path]
+
+        full_path = os.path.realpath(os.path.join(self.directory, path.lstrip('/')))
+        if full_path != self.directory and not full_path.startswith(self.directory + os.sep):
+            return None
+
+        try:
+            st = os.stat(full_path)
+            if stat.S_ISDIR(st.st_mode) and self.index:
+                full_path = os.path.join(full_path, self.index)
+                st = os.stat(full_path)
+        except OSError:
+            return None
+
+        if not stat.S_ISREG(st.st_mode):
+            return None
+
+        gzip_path = full_path + '.gz' if self.gzip else None
+        if gzip_path is not None and not os.path.isfile(gzip_path):
+            gzip_path = None
+
+        signature = file_signature(full_path, self.gzip)
+        if signature is None:
+            return None
+
+        entry = StaticFile(full_path, st, gzip_path, signature)
+        if len(self.files) >= self.cache_size:
+            self.files.pop(next(iter(self.files)))
+        self.files[path] = entry
+        return entry
+
+    def resolve_route(self, method: str, path: str) -> Tuple[Callable, Dict[str, Any]]:
+        entry = self.lookup(path)
+        if entry is None:
+            raise NotFoundError('File not Found')
+
+        if method not in self.ALLOWED_METHODS:
+            raise MethodNotAllowedError(headers={'Allow': ', '.join(self.ALLOWED_METHODS)})
+
+        return self.serve, {'entry': entry, 'head': method == 'HEAD'}
+
+    async def serve(self, request: Request, entry: StaticFile, head: bool = False) -> Response:
+        headers = request.headers or {}
+        use_gzip = (
+            entry.gzip_path is not None
+            and negotiate_encoding(headers.get('accept-encoding', '')) == 'gzip'
+        )
+        etag = entry.gzip_etag if use_gzip else entry.etag
+        response_headers = entry.gzip_headers if use_gzip else entry.headers
+
+        if etag_matches(headers.get('if-none-match'), etag):
+            vary = response_headers.get('vary')
+            return not_modified(etag, {'vary': vary} if vary else None)
+        if head:
+            return Response(200, b'', dict(response_headers))
+
+        return FileResponse(
+            200,
+            entry.gzip_path if use_gzip else entry.path,  # type: ignore
+            dict(response_headers)
+        )
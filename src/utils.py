@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import codecs
 from datetime import date, datetime
 import json
 from typing import TYPE_CHECKING, TypeVar, get_origin
@@ -10,10 +11,11 @@ import re
 from src import _types as t
 from typing import Any, Dict, Literal, Optional, Tuple, Type, get_type_hints, get_args, Annotated
 from functools import wraps
-from typing import Callable, Coroutine, Dict, Any, List, Type, Union
+from typing import AsyncIterator, Callable, Coroutine, Dict, Any, List, Type, Union
 from urllib.parse import parse_qs
+from src.codec import DEFAULT_CODEC, JSONCodec
 from src.domain.models._base import DomainModel
-from src.exceptions.http import UnprocessableEntityError
+from src.exceptions.http import PayloadTooLargeError, UnprocessableEntityError
 from src.models import DotDict, Response
 if TYPE_CHECKING:
     from granian.rsgi import Scope as GranianScope
@@ -35,11 +37,7 @@ def make_response(*args) -> Response:
     for i, arg in enumerate(args):
 
         if isinstance(arg, DomainModel):
-            body = {
-                key: value for key, value
-                in arg.to_dict().items()
-                if 'instance_state' not in key
-            }
+            body = arg.serializer()(arg)
 
         if isinstance(arg, int):
             status = arg
@@ -67,13 +65,14 @@ def validate_params(params_validator: Type[ParamsValidator]) -> Callable:
         @wraps(func)
         async def wrapper(
             self,
-            params: Dict[str, Any],
+            request: Any,
             *args,
             **kwargs
         ) -> Dict[str, Any]:
 
-            params = params_validator.validate(params)
-            return await func(self, params, *args, **kwargs)
+            # Valida a query da request; os valores convertidos substituem a query
+            request.query = params_validator.validate(dict(request.query))
+            return await func(self, request, *args, **kwargs)
 
         return wrapper
     return decorator
@@ -91,6 +90,11 @@ class ParamsValidator:
     @classmethod
     def get_field_metadata(cls) -> Dict[str, Dict[str, Any]]:
 
+        # Calculado uma vez por classe (no startup da aplicação ou no primeiro uso)
+        metadata = cls.__dict__.get('_field_metadata')
+        if metadata is not None:
+            return metadata
+
         metadata = {}
         for field_name, annotated_type in cls.__annotations__.items():
             param_type, error_message = get_args(annotated_type)
@@ -99,9 +103,23 @@ class ParamsValidator:
                 "type": param_type,
                 "msg": error_message
             }
-        
+
+        cls._field_metadata = metadata
         return metadata
 
+    @classmethod
+    def compile_all(cls) -> int:
+        """Pré-calcula os metadados de todos os validators já definidos."""
+
+        count = 0
+        pending = list(cls.__subclasses__())
+        while pending:
+            validator = pending.pop()
+            pending.extend(validator.__subclasses__())
+            validator.get_field_metadata()
+            count += 1
+        return count
+
     # @classmethod
     # def validate(cls, params: T) -> T:
     #     params_after = deepcopy(params)
@@ -146,9 +164,6 @@ class ParamsValidator:
     def _convert_type(value: Any, target_type: Any) -> Any:
         """Converte o valor para o tipo especificado."""
 
-        with open('teste', 'w') as f:
-            f.write(f'{value} {target_type}')
-
         if target_type is date:
             return date.fromisoformat(value)
         elif target_type is datetime:
@@ -171,7 +186,8 @@ def get_protocol_args(args):
 
 
 def is_rsgi_app(scope):
-    return 'RSGI' in str(scope).upper() or 'GRANIAN' in str(scope).upper()
+    # O scope ASGI é sempre um dict; o RSGI é um objeto do servidor
+    return not isinstance(scope, dict)
 
 
 def headers_to_response(
@@ -189,6 +205,106 @@ def headers_to_response(
     return result
 
 
+JSON_CONTENT_TYPE = ('content-type', 'application/json')
+
+# Headers comuns já codificados, reaproveitados em todas as respostas
+ENCODED_HEADERS: Dict[Tuple[str, str], Tuple[bytes, bytes]] = {
+    JSON_CONTENT_TYPE: (b'content-type', b'application/json'),
+    ('content-type', 'text/plain'): (b'content-type', b'text/plain'),
+    ('content-length', '0'): (b'content-length', b'0'),
+    ('Content-Length', '0'): (b'content-length', b'0'),
+}
+
+# Status que não carregam body nem content-length
+NO_BODY_STATUS = frozenset({204, 304})
+
+
+def needs_content_length(
+    headers: Dict[str, str],
+    status: int,
+    content_length: Optional[int]
+) -> bool:
+
+    # Sem tamanho conhecido (streaming) a resposta vai chunked
+    return (
+        content_length is not None
+        and status not in NO_BODY_STATUS
+        and 'content-length' not in headers
+        and 'Content-Length' not in headers
+    )
+
+
+def make_etag(version: Any) -> str:
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do `If-None-Match`, como pede o GET condicional."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    target = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    response_headers = {'etag': etag}
+    response_headers.update(headers or {})
+    return Response(304, None, response_headers)
+
+
+def check_etag(request: Any, version: Any) -> Optional[Response]:
+    """
+    Atalho para handlers que conhecem a versão do recurso sem montá-lo:
+    devolve um 304 se o cliente já tem essa versão, ou None. A resposta
+    completa deve levar o header `etag` com `make_etag(version)`.
+    """
+
+    etag = make_etag(version)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    return None
+
+
+def response_headers_str(
+    headers: Dict[str, str],
+    status: int,
+    content_length: Optional[int] = None
+) -> List[Tuple[str, str]]:
+
+    result = list(headers.items())
+    if needs_content_length(headers, status, content_length):
+        result.append(('content-length', str(content_length)))
+    return result
+
+
+def response_headers_bytes(
+    headers: Dict[str, str],
+    status: int,
+    content_length: Optional[int] = None
+) -> List[Tuple[bytes, bytes]]:
+
+    result = []
+    for item in headers.items():
+        encoded = ENCODED_HEADERS.get(item)
+        if encoded is None:
+            encoded = (item[0].encode('utf-8'), item[1].encode('utf-8'))
+        result.append(encoded)
+
+    if needs_content_length(headers, status, content_length):
+        result.append((b'content-length', str(content_length).encode('ascii')))
+    return result
+
+
 def assure_tuples_of_str(data: List[Union[Tuple[str, str], List[bytes]]]) -> List[Tuple[str, str]]:
     result = []
     for item in data:
@@ -235,11 +351,25 @@ def print_app(app):
 
 
 
+def _split_list(value: str) -> List[str]:
+    return value.split(',')
+
+
+def _split_int_list(value: str) -> List[int]:
+    return [int(x) for x in value.split(',')]
+
+
+def _split_float_list(value: str) -> List[float]:
+    return [float(x) for x in value.split(',')]
+
+
 class Route:
     def __init__(self, path: str, endpoint: Callable):
         self.path = path
         self.endpoint = endpoint
         self.pattern, self.param_names = self._compile_path(path)
+        self.segments = self._compile_segments(path)
+        self.plan = self._compile_plan()
 
     def __str__(self):
         return f'Route(path="{self.path}", pattern="{self.pattern}")'
@@ -257,6 +387,23 @@ class Route:
 
         return re.compile(f"^{regex}$"), param_names
 
+    def _compile_segments(self, path: str) -> Tuple[Union[str, re.Pattern], ...]:
+        """Quebra o path em segmentos: strings estáticas ou regex por segmento."""
+
+        segments: List[Union[str, re.Pattern]] = []
+        for segment in path.split('/'):
+            regex = re.sub(
+                r"<(\w+):([a-zA-Z0-9_\[\]-]+)>",
+                lambda m: self._convert_placeholder(m, []),
+                segment
+            )
+            if regex == segment:
+                segments.append(segment)
+            else:
+                segments.append(re.compile(regex))
+
+        return tuple(segments)
+
     def _convert_placeholder(
         self,
         match: re.Match,
@@ -295,45 +442,58 @@ class Route:
         if not matched:
             return None
 
-        g: Dict[str, type] = {
-            'int': int,
-            'str': str,
-            'float': float,
-            'list': list,
-            'list[int]': list[int],
-            'list[float]': list[float],
-            'list[str]': list[str],
-            'dict': dict
+        return self.convert(matched.groups())
+
+    def convert(self, mg: Tuple[str, ...]) -> Dict[str, Any]:
+        return {
+            name: converter(value)
+            for (name, converter), value in zip(self.plan, mg)
         }
 
-        values = {}
-        for i, param in enumerate(self.param_names):
-            typ = g[param['type']]
-            name = param['name']
-
-            mg = matched.groups()
-            if typ == int:
-                value = typ(mg[i])
-            elif typ == float:
-                value = typ(mg[i])
-            elif typ == list:
-                value = mg[i].split(',')
-            elif typ == list[int]:
-                value = [int(x) for x in mg[i].split(',')]
-            elif typ == list[float]:
-                value = [float(x) for x in mg[i].split(',')]
-            elif typ == list[str]:
-                value = mg[i].split(',')
-            elif typ == dict:
-                value = self._parse_dict(mg[i])
-            elif typ == str:
-                value = typ(mg[i])
-            else:
-                value = typ(mg[i])
+    def _compile_plan(self) -> Tuple[Tuple[str, Callable[[str], Any]], ...]:
+        """
+        Monta, uma única vez, o par (nome, conversor) de cada parâmetro,
+        já incluindo a coerção pela anotação do handler, se houver.
+        """
+
+        annotations = getattr(self.endpoint, '__annotations__', None) or {}
+
+        converters = self._converters()
+
+        plan = []
+        for param in self.param_names:
+            name, typ = param['name'], param['type']
+            converter, result_type = converters[typ]
+
+            annotation = annotations.get(name)
+            if (
+                callable(annotation)
+                and (get_origin(annotation) or annotation) is not result_type
+            ):
+                converter = self._annotated(converter, annotation)
+
+            plan.append((name, converter))
+
+        return tuple(plan)
+
+    def _converters(self) -> Dict[str, Tuple[Callable[[str], Any], type]]:
+        return {
+            'int': (int, int),
+            'str': (str, str),
+            'float': (float, float),
+            'list': (_split_list, list),
+            'list[int]': (_split_int_list, list),
+            'list[float]': (_split_float_list, list),
+            'list[str]': (_split_list, list),
+            'dict': (self._parse_dict, dict)
+        }
 
-            values[name] = value
-    
-        return values
+    @staticmethod
+    def _annotated(
+        converter: Callable[[str], Any],
+        annotation: Callable[[Any], Any]
+    ) -> Callable[[str], Any]:
+        return lambda value: annotation(converter(value))
 
     def _parse_dict(self, dict_string: str) -> Dict[str, Any]:
         items = dict_string.split(',')
@@ -379,84 +539,266 @@ def delete(pattern: str):
     return route('DELETE', pattern)
 
 
-class ProtocolParser:
+DEFAULT_MAX_BODY_SIZE = 1024 * 1024
 
-    @classmethod
-    async def asgi_parse_body(
-        cls,
-        receive: t.Receive
-    ) -> Optional[DotDict]:
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
 
-        body_bytes = b""
-        try:
-            while True:
-                message = await receive()
-                with open('teste', 'w') as f:
-                    f.write(str(message))
-                if message["type"] == "http.request":
-                    body_bytes += message.get("body", b"")
-                    if not message.get("more_body", False):
-                        break
-        except Exception as e:
-            raise UnprocessableEntityError(detail=str(e))
-        body_bytes = b"" if body_bytes == b"null" else b""
-        if not body_bytes:
-            return None
 
-        try:
-            body = json.loads(body_bytes.decode('utf-8'))
-            body = DotDict(body)
-        except json.JSONDecodeError:
-            raise UnprocessableEntityError
+def parse_json_body(body_bytes: bytes, codec: JSONCodec = DEFAULT_CODEC) -> Any:
+    if not body_bytes or body_bytes == b'null':
+        return None
+
+    try:
+        body = codec.loads(body_bytes)
+    except ValueError:
+        raise UnprocessableEntityError
+
+    return DotDict(body) if isinstance(body, dict) else body
+
+
+class BodyReader:
+    """
+    Lê o body da request em pedaços, com no máximo `max_size` bytes em
+    memória; um content-length acima do limite é rejeitado com 413 antes
+    de qualquer leitura. Chamado como `get_body(validator)` decodifica o
+    JSON inteiro; `items()` decodifica NDJSON ou um array JSON item a item.
+    """
 
-        return body
+    def __init__(
+        self,
+        source: Any,
+        rsgi: bool,
+        max_size: int = DEFAULT_MAX_BODY_SIZE,
+        content_length: Optional[int] = None,
+        content_type: Optional[str] = None,
+        codec: JSONCodec = DEFAULT_CODEC
+    ) -> None:
+
+        self.source = source
+        self.rsgi = rsgi
+        self.max_size = max_size
+        self.content_length = content_length
+        self.content_type = content_type
+        self.codec = codec
+        self.body: Optional[bytes] = None
 
     @classmethod
-    async def rsgi_parse_body(
+    def from_scope(
         cls,
-        protocol: 'RSGIHTTPProtocol'
-    ) -> Optional[DotDict]:
+        scope: Any,
+        source: Any,
+        rsgi: bool,
+        max_size: int = DEFAULT_MAX_BODY_SIZE,
+        codec: JSONCodec = DEFAULT_CODEC
+    ) -> BodyReader:
+
+        content_length = content_type = None
+        if rsgi:
+            content_length = scope.headers.get('content-length')
+            content_type = scope.headers.get('content-type')
+        else:
+            for key, value in scope.get('headers', ()):
+                if key == b'content-length':
+                    content_length = value.decode('latin-1')
+                elif key == b'content-type':
+                    content_type = value.decode('latin-1')
+
+        return cls(
+            source,
+            rsgi,
+            max_size,
+            int(content_length) if content_length and content_length.isdigit() else None,
+            content_type,
+            codec
+        )
 
-        body_bytes: bytes = await protocol()
-        if not body_bytes:
-            return None
-        body_bytes = b'' if body_bytes == b'null' else body_bytes
-        if not body_bytes:
-            return None
+    def check_size(self, size: int) -> None:
+        if size > self.max_size:
+            raise PayloadTooLargeError(
+                f'Body excede o limite de {self.max_size} bytes'
+            )
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        if self.body is not None:
+            # já lido por `read()`: o transporte não tem mais nada a entregar
+            if self.body:
+                yield self.body
+            return
+
+        if self.rsgi:
+            async for chunk in self.source:
+                yield chunk
+            return
+
+        while True:
+            message = await self.source()
+            if message['type'] == 'http.disconnect':
+                return
+            if message['type'] == 'http.request':
+                chunk = message.get('body', b'')
+                if chunk:
+                    yield chunk
+                if not message.get('more_body', False):
+                    return
+
+    async def read(self) -> bytes:
+        if self.body is not None:
+            return self.body
+
+        if self.content_length is not None:
+            self.check_size(self.content_length)
+
+        buffer = bytearray()
+        async for chunk in self.chunks():
+            buffer += chunk
+            self.check_size(len(buffer))
+
+        self.body = bytes(buffer)
+        return self.body
+
+    async def __call__(self, validator: Optional[Type[ParamsValidator]] = None):
+        request_body = parse_json_body(await self.read(), self.codec)
+        if validator is None:
+            return request_body
+
+        if not isinstance(request_body, DotDict):
+            raise UnprocessableEntityError('Tipo de body incorreto')
+
+        return validator.validate(request_body)
+
+    async def items(self) -> AsyncIterator[Any]:
+        """
+        Itens de um body NDJSON (pelo content-type) ou de um array JSON,
+        decodificados conforme chegam. O limite vale para o que está em
+        buffer a cada momento, não para o body inteiro.
+        """
+
+        content_type = (self.content_type or '').split(';')[0].strip()
+        parse = self._ndjson_items if content_type in NDJSON_CONTENT_TYPES else self._array_items
+        async for item in parse():
+            yield DotDict(item) if isinstance(item, dict) else item
 
-        body_string = body_bytes.decode('utf-8')
+    async def _ndjson_items(self) -> AsyncIterator[Any]:
+        buffer = bytearray()
+        async for chunk in self.chunks():
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b'\n', start)
+                if end == -1:
+                    break
+                line = buffer[start:end].strip()
+                start = end + 1
+                if line:
+                    yield self._loads(line)
+
+            del buffer[:start]
+            self.check_size(len(buffer))
+
+        if buffer.strip():
+            yield self._loads(buffer)
+
+    async def _array_items(self) -> AsyncIterator[Any]:
+        decoder = json.JSONDecoder()
+        text = codecs.getincrementaldecoder('utf-8')()
+        buffer, expect = '', '['
+
+        async for chunk in self.chunks():
+            buffer += text.decode(chunk)
+            buffer, expect, items = self._scan_array(decoder, buffer, expect, False)
+            for item in items:
+                yield item
+            self.check_size(len(buffer))
+
+        buffer += text.decode(b'', final=True)
+        buffer, expect, items = self._scan_array(decoder, buffer, expect, True)
+        for item in items:
+            yield item
+
+        if expect not in ('[', 'end'):
+            raise UnprocessableEntityError('Array JSON incompleto')
+
+    def _loads(self, data: Union[bytes, bytearray]) -> Any:
         try:
-            body = json.loads(body_string)
-            body = DotDict(body)
-        except json.JSONDecodeError:
+            return self.codec.loads(data)
+        except ValueError:
             raise UnprocessableEntityError
-        
-        return body
 
-    @classmethod
-    def make_get_body_callback(cls, scope, receive_or_protocol):
-        async def get_body(validator: Optional[Type[ParamsValidator]] = None):
+    @staticmethod
+    def _scan_array(
+        decoder: json.JSONDecoder,
+        buffer: str,
+        expect: str,
+        final: bool
+    ) -> Tuple[str, str, List[Any]]:
+
+        items: List[Any] = []
+        pos, size = 0, len(buffer)
+        while True:
+            while pos < size and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos == size:
+                break
+
+            char = buffer[pos]
+            if expect == '[':
+                if char != '[':
+                    raise UnprocessableEntityError('Esperado um array JSON')
+                pos, expect = pos + 1, 'first'
+
+            elif expect == 'first' and char == ']':
+                pos, expect = pos + 1, 'end'
+
+            elif expect in ('first', 'item'):
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise UnprocessableEntityError
+                    break
+                # Um número no fim do buffer pode continuar no próximo pedaço
+                if end == size and not final:
+                    break
+                items.append(item)
+                pos, expect = end, 'separator'
+
+            elif expect == 'separator' and char in ',]':
+                pos, expect = pos + 1, 'item' if char == ',' else 'end'
 
-            if is_rsgi_app(scope):
-                request_body = await ProtocolParser.rsgi_parse_body(
-                    receive_or_protocol
-                )
             else:
-                request_body = await ProtocolParser.asgi_parse_body(
-                    receive_or_protocol
-                )
+                raise UnprocessableEntityError('Array JSON inválido')
 
-            if validator is None:
-                return request_body
+        return buffer[pos:], expect, items
 
-            if validator is None and not request_body:
-                return None
 
-            if not isinstance(request_body, DotDict):
-                raise UnprocessableEntityError('Tipo de body incorreto')
+class ProtocolParser:
 
-            request_body = validator.validate(request_body)
-            return request_body
-        
+    @classmethod
+    async def asgi_parse_body(
+        cls,
+        receive: t.Receive
+    ) -> Optional[DotDict]:
+
+        return await BodyReader(receive, rsgi=False)()
+
+    @classmethod
+    async def rsgi_parse_body(
+        cls,
+        protocol: 'RSGIHTTPProtocol'
+    ) -> Optional[DotDict]:
 
-        return get_body
+        return await BodyReader(protocol, rsgi=True)()
+
+    @classmethod
+    def make_get_body_callback(
+        cls,
+        scope,
+        receive_or_protocol,
+        rsgi: Optional[bool] = None,
+        max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+        codec: JSONCodec = DEFAULT_CODEC
+    ) -> BodyReader:
+
+        if rsgi is None:
+            rsgi = is_rsgi_app(scope)
+        return BodyReader.from_scope(scope, receive_or_protocol, rsgi, max_body_size, codec)
@@ -5,37 +5,68 @@ from src.models import Response
 
 
 class RSGIHTTPProtocol:
-    def __init__(self, body: Dict[str, Any]):
+    def __init__(self, body: Any, chunk_size: Optional[int] = None):
         self.body = body
+        self.chunk_size = chunk_size
         self.response: Optional[Response]
 
     async def __call__(self) -> bytes:
+        if isinstance(self.body, bytes):
+            return self.body
         try:
             return json.dumps(self.body).encode('utf-8')
         except:
             return str(self.body).encode('utf-8')
+
+    async def __aiter__(self) -> Any:
+        data = await self()
+        size = self.chunk_size or len(data) or 1
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
         
     def get_response(self) -> Response:
         assert self.response
         return self.response
 
-    def __aiter__(self) -> Any: ...
     def response_empty(self, status: int, headers: List[Tuple[str, str]]): ...
 
     def response_str(self, status: int, headers: List[Tuple[str, str]], body: str):
         r = Response(status, body, { item[0]: item[1] for item in headers })
         self.response = r
 
-    def response_bytes(self, status: int, headers: List[Tuple[str, str]], body: bytes): ...
-    def response_file(self, status: int, headers: List[Tuple[str, str]], file: str): ...
-    def response_stream(self, status: int, headers: List[Tuple[str, str]]) -> Any: ...
+    def response_bytes(self, status: int, headers: List[Tuple[str, str]], body: bytes):
+        try:
+            self.response_str(status, headers, body.decode('utf-8'))
+        except UnicodeDecodeError:
+            self.response_str(status, headers, body)  # type: ignore
+    def response_file(self, status: int, headers: List[Tuple[str, str]], file: str):
+        self.file = file
+        with open(file, 'rb') as f:
+            self.response_bytes(status, headers, f.read())
+    def response_stream(self, status: int, headers: List[Tuple[str, str]]) -> Any:
+        self.response_str(status, headers, '')
+        self.chunks: List[bytes] = []
+        return self
+
+    async def send_bytes(self, data: bytes):
+        assert self.response
+        self.chunks.append(data)
+        body = b''.join(self.chunks)
+        try:
+            self.response.body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            self.response.body = body
+
+    async def send_str(self, data: str):
+        await self.send_bytes(data.encode('utf-8'))
 
 
 class RSGIHeaders:
     def __init__(self, items: Dict[str, str]):
         self.__items: List[Tuple[str, str]] = []
+        # Como no granian, as chaves chegam em minúsculas
         for key, value in items.items():
-            self.__items.append((key, value))
+            self.__items.append((key.lower(), value))
 
     def __contains__(self, key: str) -> bool:
         return any(k == key for k, _ in self.__items)
@@ -55,6 +86,9 @@ class RSGIHeaders:
                 return v
         return default
 
+    def get_all(self, key: str) -> List[str]:
+        return [v for k, v in self.__items if k == key]
+
 
 @dataclass
 class Scope:
@@ -132,9 +166,9 @@ class TestClient:
 
 def make_controller_request(query: dict, body: Any, headers = {}):
     
-    from src.models import Request
+    from src.models import Headers, Request
 
     async def f(*args):
         return body
 
-    return Request(query, f, headers)
+    return Request(query, f, Headers.from_dict(headers))
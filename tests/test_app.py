@@ -1,7 +1,13 @@
+import asyncio
 from datetime import date, datetime, timedelta
 import json
 from secrets import token_urlsafe
+import gzip
+import os
+import tempfile
+from types import SimpleNamespace
 import unittest
+from unittest.mock import patch
 
 
 from src.domain.models import (
@@ -12,10 +18,17 @@ from src.domain.models import (
     Tarefa,
     Medicamento
 )
+from src.codec import DEFAULT_CODEC, OrjsonCodec, StdlibCodec, get_codec, iter_json_array, orjson
+from src.domain.models._base import DomainModel
 
-from src.exceptions.http import NotFoundError, UnauthorizedError
-from tests.mock import TestClient
+from src.exceptions.http import MethodNotAllowedError, NotFoundError, PayloadTooLargeError, UnauthorizedError, UnprocessableEntityError
+from tests.mock import RSGIHeaders, RSGIHTTPProtocol, TestClient
 from src import App
+from src.models import DotDict, Headers, QueryParams, Response, StreamingResponse
+from src.routers._base import APIRouter
+from src.staticfiles import StaticFiles
+from src.utils import get, post, make_response, parse_json_body, BodyReader, ENCODED_HEADERS, JSON_CONTENT_TYPE, response_headers_bytes, response_headers_str
+from src.middlewares import CORSMiddleware2, HandleErrorMiddleware, RequestLoggingMiddleware
 
 
 PACIENTE_DATA = dict(
@@ -65,7 +78,7 @@ class Test_1_App(unittest.IsolatedAsyncioTestCase):
             query_string='teste=1'
         )
         self.assertEqual(response.status, 200)
-        self.assertEqual(response.body, json.dumps({'id': 1}))
+        self.assertEqual(json.loads(response.body), {'id': 1})
 
     async def test_5_controller_3(self):
         response = await self.client.get(
@@ -75,7 +88,7 @@ class Test_1_App(unittest.IsolatedAsyncioTestCase):
             query_string='teste=1'
         )
         self.assertEqual(response.status, 200)
-        self.assertEqual(response.body, json.dumps({'arg1': 1, 'arg2': 2}))
+        self.assertEqual(json.loads(response.body), {'arg1': 1, 'arg2': 2})
 
     async def test_6_controller_4(self):
         response = await self.client.get(
@@ -85,7 +98,7 @@ class Test_1_App(unittest.IsolatedAsyncioTestCase):
             query_string='key1=value1&key2=value2'
         )
         self.assertEqual(response.status, 200)
-        self.assertEqual(response.body, json.dumps({'name': 'antonio'}))
+        self.assertEqual(json.loads(response.body), {'name': 'antonio'})
 
     async def test_7_controller_5(self):
         token = token_urlsafe(10)
@@ -97,15 +110,15 @@ class Test_1_App(unittest.IsolatedAsyncioTestCase):
         )
         self.assertEqual(response.status, 200)
         self.assertEqual(
-            response.body,
-            json.dumps({
+            json.loads(response.body),
+            {
                 'token': token,
                 'user_id': 10,
                 'query': {
                     'key1': 'value1',
                     'key2': 'value2'
                 }
-            })
+            }
         )
 
 
@@ -250,6 +263,31 @@ class Test_3_Fluxo(unittest.IsolatedAsyncioTestCase):
         self.assertEquals(response.status, 200)
         self.assertEquals(d.nome, self.data['doenca'].nome)
 
+    async def test_2_etag_doenca(self):
+        headers = await self.auth_headers()
+        query_string = f'id={self.data["doenca"].id}'
+        first = await self.client.get(path='/doencas/', query_string=query_string, headers=headers)
+        etag = first.headers['etag']
+
+        with patch('src.repository.sql.GenericRepository.to_dict', side_effect=AssertionError):
+            cached = await self.client.get(
+                path='/doencas/', query_string=query_string,
+                headers=dict(headers, **{'if-none-match': etag})
+            )
+        self.assertEqual((cached.status, cached.body), (304, ''))
+
+        await self.client.put(
+            path=f'/doencas/{self.data["doenca"].id}',
+            headers=headers,
+            body=dict(self.data['doenca'].to_dict(), descricao='gripe forte'),
+        )
+        changed = await self.client.get(
+            path='/doencas/', query_string=query_string,
+            headers=dict(headers, **{'if-none-match': etag})
+        )
+        self.assertEqual(changed.status, 200)
+        self.assertNotEqual(changed.headers['etag'], etag)
+
     async def test_3_remover_doenca(self):
         response = await self.client.delete(
             path=f'/doencas/{self.data["doenca"].id}',
@@ -258,9 +296,8 @@ class Test_3_Fluxo(unittest.IsolatedAsyncioTestCase):
             query_string=''
         )
 
-        body = json.loads(response.body)
         self.assertEquals(response.status, 204)
-        self.assertEquals(body, None)
+        self.assertEquals(response.body, '')
         self.data.pop('doenca')
 
     async def test_4_criar_exames(self):
@@ -441,3 +478,692 @@ class Test_3_Fluxo(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(response.status, 204)
         self.data.pop('medicamento')
+
+
+class Test_4_RawRoutes(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        app = App(mode='test')
+
+        @app.raw('GET', '/health')
+        async def health(scope, protocol):
+            protocol.response_str(200, [('content-type', 'text/plain')], 'ok')
+
+        @app.raw('GET', '/raw/<id:int>')
+        def raw_item(scope, protocol, id: int):
+            protocol.response_str(200, [('content-type', 'text/plain')], str(id * 2))
+
+        cls.client = TestClient(app)
+
+    async def test_1_static_raw_route(self):
+        response = await self.client.get(path='/health')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, 'ok')
+
+    async def test_2_dynamic_raw_route(self):
+        response = await self.client.get(path='/raw/21')
+        self.assertEqual(response.body, '42')
+
+    async def test_3_falls_through_to_pipeline(self):
+        response = await self.client.get(path='/teste/1/')
+        self.assertEqual(json.loads(response.body), {'id': 1})
+
+        with self.assertRaises(NotFoundError):
+            await self.client.post(path='/health')
+
+
+class Test_5_ProtocolPipelines(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = (
+            App(mode='test')
+                .add_middleware(CORSMiddleware2, ['localhost'])
+                .add_middleware(RequestLoggingMiddleware)
+                .add_middleware(HandleErrorMiddleware)
+        )
+        cls.client = TestClient(cls.app)
+
+    async def test_1_rsgi_without_sniffing(self):
+        with patch('src.is_rsgi_app', side_effect=AssertionError), \
+                patch('src.utils.is_rsgi_app', side_effect=AssertionError):
+            response = await self.client.get(path='/teste/1/')
+            not_found = await self.client.get(path='/inexistente/')
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.body), {'id': 1})
+        self.assertEqual(response.headers['content-length'], str(len(response.body)))
+        self.assertEqual(not_found.status, 404)
+
+    async def test_2_asgi(self):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/teste/2/',
+            'query_string': b'',
+            'headers': [(b'content-type', b'application/json')],
+            'client': ('localhost', 5000),
+        }
+        with patch('src.is_rsgi_app', side_effect=AssertionError), \
+                patch('src.utils.is_rsgi_app', side_effect=AssertionError):
+            await self.app(scope, receive, send)
+
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(
+            (b'access-control-allow-origin', b'*'), messages[0]['headers']
+        )
+        content_length = str(len(messages[-1]['body'])).encode()
+        self.assertIn((b'content-length', content_length), messages[0]['headers'])
+        self.assertEqual(json.loads(messages[-1]['body']), {'id': 2})
+        self.assertFalse(messages[-1]['more_body'])
+
+    async def test_2_asgi_no_body_status(self):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'OPTIONS',
+            'path': '/teste/2/',
+            'query_string': b'',
+            'headers': [],
+            'client': ('localhost', 5000),
+        }
+        await self.app(scope, receive, send)
+
+        self.assertEqual(messages[0]['status'], 204)
+        self.assertEqual(messages[-1]['body'], b'')
+        self.assertEqual(dict(messages[0]['headers']).get(b'content-length', b'0'), b'0')
+
+    def test_3_pre_encoded_headers(self):
+        headers = response_headers_bytes({'content-type': 'application/json'}, 200, 2)
+        self.assertIs(headers[0], ENCODED_HEADERS[JSON_CONTENT_TYPE])
+        self.assertEqual(headers[1], (b'content-length', b'2'))
+
+        self.assertEqual(response_headers_str({'Allow': 'GET'}, 204, 0), [('Allow', 'GET')])
+
+
+class StreamingController:
+
+    url_prefix = '/stream/'
+
+    @get('/async')
+    async def stream_async(self, request):
+        async def rows():
+            yield '['
+            for i in range(3):
+                yield ('' if i == 0 else ',') + json.dumps({'id': i})
+            yield ']'
+
+        return StreamingResponse(200, rows())
+
+    @get('/sync')
+    async def stream_sync(self, request):
+        return StreamingResponse(200, [b'a', 'b', b'c'], {'content-type': 'text/plain'})
+
+
+class Test_6_StreamingResponse(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = App(mode='test', routers=[APIRouter(StreamingController())])
+        cls.client = TestClient(cls.app)
+
+    async def test_1_rsgi_stream(self):
+        response = await self.client.get(path='/stream/async')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.body), [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertNotIn('content-length', response.headers)
+
+    async def test_2_through_middleware(self):
+        client = TestClient(
+            App(mode='test', routers=[APIRouter(StreamingController())])
+                .add_middleware(CORSMiddleware2, [''])
+        )
+        response = await client.get(path='/stream/sync')
+        self.assertEqual(response.body, 'abc')
+        self.assertEqual(response.headers['access-control-allow-origin'], '*')
+
+    async def test_3_asgi_stream(self):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/stream/sync',
+            'query_string': b'',
+            'headers': [],
+            'client': ('localhost', 5000),
+        }
+        await self.app(scope, receive, send)
+
+        self.assertEqual(messages[0]['headers'], [(b'content-type', b'text/plain')])
+        self.assertEqual([m['body'] for m in messages[1:]], [b'a', b'b', b'c', b''])
+        self.assertEqual([m['more_body'] for m in messages[1:]], [True, True, True, False])
+
+
+class BodyController:
+
+    url_prefix = '/body/'
+
+    @post('/')
+    async def ler(self, request):
+        return make_response({'body': await request.get_body()})
+
+    @post('/itens')
+    async def itens(self, request):
+        return make_response({'itens': [item async for item in request.iter_body()]})
+
+
+class Test_7_BodyReader(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = TestClient(
+            App(mode='test', routers=[APIRouter(BodyController())], max_body_size=64)
+                .add_middleware(HandleErrorMiddleware)
+        )
+
+    def rsgi_reader(self, body, chunk_size=None, headers=None):
+        protocol = RSGIHTTPProtocol(body, chunk_size)
+        scope = SimpleNamespace(headers=RSGIHeaders(headers or {}))
+        return BodyReader.from_scope(scope, protocol, rsgi=True, max_size=64)
+
+    async def test_1_read_and_limit(self):
+        response = await self.client.post(path='/body/', body={'nome': 'teste'})
+        self.assertEqual(json.loads(response.body), {'body': {'nome': 'teste'}})
+
+        response = await self.client.post(path='/body/', body={'nome': 'x' * 100})
+        self.assertEqual(response.status, 413)
+
+    async def test_2_content_length_rejected_before_reading(self):
+        reader = self.rsgi_reader({'nome': 'teste'}, headers={'content-length': '1000'})
+        with patch.object(RSGIHTTPProtocol, '__aiter__', side_effect=AssertionError):
+            with self.assertRaises(PayloadTooLargeError):
+                await reader()
+
+    async def test_3_asgi_chunks(self):
+        messages = [
+            {'type': 'http.request', 'body': b'{"nome": ', 'more_body': True},
+            {'type': 'http.request', 'body': b'"teste"}', 'more_body': False},
+        ]
+
+        async def receive():
+            return messages.pop(0)
+
+        reader = BodyReader.from_scope({'headers': []}, receive, rsgi=False)
+        self.assertEqual(await reader(), {'nome': 'teste'})
+
+    async def test_3_items_after_read(self):
+        messages = [{'type': 'http.request', 'body': b'[1, 2, 3]', 'more_body': False}]
+
+        async def receive():
+            if not messages:
+                raise AssertionError('receive() chamado depois do fim do body')
+            return messages.pop(0)
+
+        reader = BodyReader.from_scope({'headers': []}, receive, rsgi=False)
+        self.assertEqual(await reader(), [1, 2, 3])
+        self.assertEqual([item async for item in reader.items()], [1, 2, 3])
+
+    async def test_4_json_array_items(self):
+        body = [{'id': i, 'nome': 'ação'} for i in range(20)] + [12345]
+        reader = self.rsgi_reader(body, chunk_size=7)
+        items = [item async for item in reader.items()]
+        self.assertEqual(items, body)
+        self.assertEqual(items[0].nome, 'ação')
+
+        with self.assertRaises(UnprocessableEntityError):
+            [item async for item in self.rsgi_reader(b'[1, 2', chunk_size=2).items()]
+
+    async def test_5_ndjson_items(self):
+        body = b''.join(json.dumps({'id': i}).encode() + b'\n' for i in range(20))
+        reader = self.rsgi_reader(
+            body, chunk_size=5, headers={'content-type': 'application/x-ndjson'}
+        )
+        self.assertEqual([item.id async for item in reader.items()], list(range(20)))
+
+    async def test_6_items_endpoint(self):
+        response = await self.client.post(path='/body/itens', body=list(range(50)))
+        self.assertEqual(json.loads(response.body), {'itens': list(range(50))})
+
+
+class Test_8_StaticFiles(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        root = cls.directory.name
+        with open(os.path.join(root, 'exame.pdf'), 'w') as f:
+            f.write('conteudo do exame')
+        with open(os.path.join(root, 'app.js'), 'w') as f:
+            f.write('console.log(1)')
+        with gzip.open(os.path.join(root, 'app.js.gz'), 'wt') as f:
+            f.write('console.log(1)')
+
+        cls.static = StaticFiles(root)
+        cls.app = App(mode='test', routers=[])
+        cls.app.mount('/static', cls.static)
+        cls.client = TestClient(cls.app)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    async def test_1_file_response(self):
+        response = await self.client.get(path='/static/exame.pdf')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, 'conteudo do exame')
+        self.assertEqual(response.headers['content-type'], 'application/pdf')
+        self.assertEqual(response.headers['content-length'], '17')
+
+    async def test_2_cached_metadata_and_etag(self):
+        first = await self.client.get(path='/static/exame.pdf')
+        with patch('src.staticfiles.os.stat', side_effect=AssertionError):
+            second = await self.client.get(
+                path='/static/exame.pdf',
+                headers={'if-none-match': first.headers['etag']}
+            )
+
+        self.assertEqual(second.status, 304)
+        self.assertEqual(second.body, '')
+
+    async def test_3_revalidation(self):
+        static = StaticFiles(self.directory.name, ttl=0)
+        file_path = os.path.join(self.directory.name, 'laudo.txt')
+        with open(file_path, 'w') as f:
+            f.write('curto')
+        self.assertEqual(static.lookup('laudo.txt').headers['content-length'], '5')
+
+        with open(file_path, 'w') as f:
+            f.write('laudo mais longo')
+        self.assertEqual(static.lookup('laudo.txt').headers['content-length'], '16')
+
+        os.remove(file_path)
+        self.assertIsNone(static.lookup('laudo.txt'))
+        self.assertNotIn('laudo.txt', static.files)
+
+    async def test_3_revalidation_with_route_cache(self):
+        app = App(mode='test', routers=[], route_cache_size=100)
+        app.mount('/static', StaticFiles(self.directory.name, ttl=0))
+        client = TestClient(app)
+        file_path = os.path.join(self.directory.name, 'receita.txt')
+        self.addCleanup(lambda: os.path.exists(file_path) and os.remove(file_path))
+
+        with self.assertRaises(NotFoundError):
+            await client.get(path='/static/receita.txt')
+        with open(file_path, 'w') as f:
+            f.write('abc')
+        response = await client.get(path='/static/receita.txt')
+        self.assertEqual((response.status, response.headers['content-length']), (200, '3'))
+
+        with open(file_path, 'w') as f:
+            f.write('abcdefgh')
+        response = await client.get(path='/static/receita.txt')
+        self.assertEqual(response.body, 'abcdefgh')
+        self.assertEqual(response.headers['content-length'], '8')
+        self.assertEqual(app.route_cache_stats()['size'], 0)
+
+    async def test_3_head_and_not_modified(self):
+        entry = self.static.lookup('exame.pdf')
+        request = SimpleNamespace(headers=Headers.from_dict({}))
+        head = await self.static.serve(request, entry, head=True)
+        self.assertNotIsInstance(head, StreamingResponse)
+        self.assertEqual(self.app.encode_body(head), b'')
+        self.assertEqual(head.headers['content-length'], '17')
+
+        request = SimpleNamespace(headers=Headers.from_dict({'if-none-match': entry.etag}))
+        cached = await self.static.serve(request, entry)
+        self.assertEqual((type(cached), cached.status), (Response, 304))
+        self.assertEqual(self.app.encode_body(cached), b'')
+
+    async def test_3_gzip_sidecar(self):
+        response = await self.client.get(
+            path='/static/app.js', headers={'accept-encoding': 'gzip, br'}
+        )
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.body), b'console.log(1)')
+        self.assertTrue(response.headers['etag'].endswith('-gz"'))
+        self.assertEqual(response.headers['vary'], 'accept-encoding')
+
+        cached = await self.client.get(
+            path='/static/app.js',
+            headers={'accept-encoding': 'gzip', 'if-none-match': response.headers['etag']}
+        )
+        self.assertEqual((cached.status, cached.headers['vary']), (304, 'accept-encoding'))
+
+        for accept_encoding in ('', 'gzip;q=0', 'identity, gzip;q=0'):
+            plain = await self.client.get(
+                path='/static/app.js', headers={'accept-encoding': accept_encoding}
+            )
+            self.assertEqual(plain.body, 'console.log(1)')
+            self.assertNotIn('content-encoding', plain.headers)
+            self.assertEqual(plain.headers['vary'], 'accept-encoding')
+
+    async def test_4_not_found_and_method(self):
+        with self.assertRaises(NotFoundError):
+            await self.client.get(path='/static/../exame.pdf')
+        with self.assertRaises(NotFoundError):
+            await self.client.get(path='/static/nao-existe.pdf')
+        with self.assertRaises(MethodNotAllowedError):
+            await self.client.post(path='/static/exame.pdf')
+
+    async def test_5_asgi_pathsend_and_fallback(self):
+        for extensions, expected in (
+            ({'http.response.pathsend': {}}, 'http.response.pathsend'),
+            ({}, 'http.response.body'),
+        ):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': '/static/exame.pdf',
+                'query_string': b'',
+                'headers': [],
+                'extensions': extensions,
+            }
+            await self.app(scope, None, send)  # type: ignore
+
+            self.assertEqual(messages[1]['type'], expected)
+            if expected == 'http.response.body':
+                body = b''.join(m['body'] for m in messages[1:])
+                self.assertEqual(body, b'conteudo do exame')
+                self.assertFalse(messages[-1]['more_body'])
+
+
+class Test_9_Lifespan(unittest.TestCase):
+
+    def make_app(self):
+        calls = []
+        app = App(mode='test', routers=[APIRouter(BodyController())])
+        app = app.add_middleware(HandleErrorMiddleware)
+
+        @app.on_startup
+        async def abrir():
+            calls.append('abrir')
+
+        @app.on_shutdown
+        def fechar():
+            calls.append('fechar')
+
+        return app, calls
+
+    def test_1_asgi_handshake(self):
+        app, calls = self.make_app()
+        incoming = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+            if message['type'] == 'lifespan.startup.complete':
+                self.assertEqual(calls, ['abrir'])
+
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertEqual(calls, ['abrir', 'fechar'])
+        self.assertIsNotNone(app.root_app().routers[0].matcher)
+
+    def test_2_startup_failed(self):
+        app, _ = self.make_app()
+
+        @app.on_startup
+        def falhar():
+            raise RuntimeError('sem banco')
+
+        incoming = [{'type': 'lifespan.startup'}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, [{'type': 'lifespan.startup.failed', 'message': 'sem banco'}])
+
+    def test_3_rsgi_init_and_del(self):
+        app, calls = self.make_app()
+        loop = asyncio.new_event_loop()
+        try:
+            app.__rsgi_init__(loop)
+            app.__rsgi_init__(loop)
+            app.__rsgi_del__(loop)
+        finally:
+            loop.close()
+
+        self.assertEqual(calls, ['abrir', 'fechar'])
+
+    def test_4_rsgi_hooks_on_running_loop(self):
+        app, calls = self.make_app()
+
+        async def embedded():
+            loop = asyncio.get_running_loop()
+            await app.__rsgi_init__(loop)
+            self.assertEqual(calls, ['abrir'])
+            await app.__rsgi_del__(loop)
+
+        asyncio.run(embedded())
+        self.assertEqual(calls, ['abrir', 'fechar'])
+
+
+class Test_10_Headers(unittest.TestCase):
+
+    def test_1_asgi_lazy_and_case_insensitive(self):
+        raw = [
+            (b'content-type', b'application/json'),
+            (b'accept', b'text/html'),
+            (b'accept', b'application/json'),
+        ]
+        headers = Headers(raw)
+
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        self.assertEqual(headers.cache, {'content-type': 'application/json'})
+        self.assertEqual(headers.getlist('ACCEPT'), ['text/html', 'application/json'])
+        self.assertIsNone(headers.get('authorization'))
+        self.assertNotIn('authorization', headers)
+        self.assertEqual(list(headers), ['content-type', 'accept'])
+        self.assertIs(headers.raw, raw)
+
+    def test_2_rsgi(self):
+        headers = Headers(RSGIHeaders({'Authorization': 'bearer x', 'accept': 'a'}), rsgi=True)
+        self.assertEqual(headers.get('AUTHORIZATION'), 'bearer x')
+        self.assertEqual(headers.getlist('accept'), ['a'])
+        self.assertEqual(dict(headers), {'authorization': 'bearer x', 'accept': 'a'})
+
+
+class Test_11_QueryParams(unittest.IsolatedAsyncioTestCase):
+
+    def test_1_lazy_parsing(self):
+        query = QueryParams(b'id=1&id=2&ativo=sim&nome=ana%20maria&vazio=')
+        self.assertIsNone(query.values)
+
+        self.assertEqual(query['id'], '1')
+        self.assertEqual(query.getlist('id', int), [1, 2])
+        self.assertEqual(query.get_int('id'), 1)
+        self.assertTrue(query.get_bool('ativo'))
+        self.assertEqual(query['nome'], 'ana maria')
+        self.assertEqual(query['vazio'], '')
+        self.assertEqual(query.get_float('preco', 1.5), 1.5)
+        self.assertEqual(query.getlist('outro'), [])
+
+    def test_2_typed_errors(self):
+        query = QueryParams('id=abc&ativo=talvez')
+        with self.assertRaises(UnprocessableEntityError):
+            query.get_int('id')
+        with self.assertRaises(UnprocessableEntityError):
+            query.get_bool('ativo')
+
+    async def test_3_validate_params(self):
+        client = TestClient(App(mode='test'))
+        response = await client.get(path='/teste/1/', query_string='a=1')
+        self.assertEqual(response.status, 200)
+
+        with self.assertRaises(NotFoundError):
+            await client.get(path='/doencas/', query_string='id=999999')
+        with self.assertRaises(UnprocessableEntityError):
+            await client.get(path='/doencas/', query_string='id=abc')
+
+
+class Test_12_Serializers(unittest.TestCase):
+
+    def test_1_generated_serializer(self):
+        consulta = Consulta(datetime(2024, 5, 1, 9, 30), 'rotina', 'Dr. Ana', _id=3)
+        serializer = Consulta.serializer()
+        self.assertIs(Consulta.serializer(), serializer)
+        self.assertIsNot(Paciente.serializer(), serializer)
+
+        body = consulta.to_dict()
+        self.assertEqual(list(body)[:3], ['id', 'horario', 'motivo'])
+        self.assertEqual(body['horario'], '2024-05-01T09:30:00')
+        self.assertFalse(any(key.startswith('_') for key in body))
+        self.assertEqual(make_response(consulta).body, body)
+
+        consulta.horario = '2024-05-01T09:30:00'
+        consulta._id = None
+        self.assertEqual(consulta.to_dict()['horario'], '2024-05-01T09:30:00')
+        self.assertNotIn('id', consulta.to_dict())
+
+    def test_2_reflective_fallback(self):
+        tarefa = Tarefa('revisar', date(2024, 1, 2), 'aberta', 1)
+        self.assertEqual(tarefa.to_dict()['data_limite'], '2024-01-02')
+
+        class Livre(DomainModel):
+            pass
+
+        livre = Livre(_id=1, nome='x', quando=date(2024, 1, 2))
+        self.assertEqual(livre.to_dict(), {'id': 1, 'nome': 'x', 'quando': '2024-01-02'})
+
+
+class Test_13_Codec(unittest.IsolatedAsyncioTestCase):
+
+    @unittest.skipIf(orjson is None, 'orjson não instalado')
+    def test_1_codecs_agree(self):
+        payload = DotDict({
+            'nome': 'José',
+            'quando': datetime(2024, 5, 1, 9, 30),
+            'dia': date(2024, 5, 1),
+            'itens': [DotDict(a=1), None, 1.5],
+            'consulta': Consulta(datetime(2024, 5, 1), 'rotina', 'Dr. Ana', _id=1),
+        })
+        encoded = {codec.name: codec.dumps(payload) for codec in (StdlibCodec(), OrjsonCodec())}
+        self.assertEqual(encoded['json'], encoded['orjson'])
+        self.assertIsInstance(encoded['json'], bytes)
+        self.assertEqual(StdlibCodec().loads(encoded['json'])['dia'], '2024-05-01')
+
+        with self.assertRaises(UnprocessableEntityError):
+            parse_json_body(b'{"a":', OrjsonCodec())
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+
+    async def test_2_app_codec(self):
+        app = App(mode='test', codec='json')
+        self.assertIsInstance(app.codec, StdlibCodec)
+        self.assertIs(App(mode='test').codec, DEFAULT_CODEC)
+
+        response = await TestClient(app).post(
+            path='/teste/login/abc/', body={'user_id': 1}, query_string=''
+        )
+        self.assertEqual(json.loads(response.body)['user_id'], 1)
+
+
+class Test_14_Slots(unittest.TestCase):
+
+    def test_1_no_instance_dict(self):
+        objects = (
+            make_response({'id': 1}),
+            StreamingResponse(200, ()),
+            DotDict(a=1),
+        )
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), obj)
+
+    def test_2_dotdict_attributes(self):
+        body = DotDict(nome='ana')
+        body.idade = 30
+        self.assertEqual(body, {'nome': 'ana', 'idade': 30})
+        self.assertEqual(body.nome, 'ana')
+        self.assertIsNone(getattr(body, 'outro', None))
+        with self.assertRaises(AttributeError):
+            body.outro
+        del body.idade
+        with self.assertRaises(AttributeError):
+            del body.idade
+
+
+class Test_15_JSONArrayStream(unittest.IsolatedAsyncioTestCase):
+
+    def test_1_sync_chunks(self):
+        items = ({'id': i, 'dia': date(2024, 1, 1)} for i in range(100))
+        chunks = list(iter_json_array(items, flush_size=256))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) < 256 + 64 for chunk in chunks))
+        self.assertEqual(json.loads(b''.join(chunks)), [{'id': i, 'dia': '2024-01-01'} for i in range(100)])
+        self.assertEqual(list(iter_json_array([])), [b'[]'])
+
+    async def test_2_async_items(self):
+        async def cursor():
+            for i in range(3):
+                yield Doenca(f'doenca {i}', _id=i + 1)
+
+        chunks = [chunk async for chunk in iter_json_array(cursor(), Doenca.serializer())]
+        self.assertEqual([item['id'] for item in json.loads(b''.join(chunks))], [1, 2, 3])
+
+    async def test_3_closes_items_on_disconnect(self):
+        closed = []
+
+        def rows():
+            try:
+                for i in range(100):
+                    yield {'id': i}
+            finally:
+                closed.append(True)
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                raise ConnectionResetError
+
+        response = StreamingResponse(200, iter_json_array(rows(), flush_size=16))
+        with self.assertRaises(ConnectionResetError):
+            await App(mode='test').send_stream_asgi(send, response)
+        self.assertEqual(closed, [True])
+
+    async def test_4_list_endpoints(self):
+        client = TestClient(App(mode='test'))
+        for path in ('/consultas/all/', '/doencas/all/', '/exames/all/', '/medicamentos/all/'):
+            response = await client.get(path=path)
+            self.assertEqual(response.status, 200)
+            items = json.loads(response.body)
+            self.assertIsInstance(items, list)
+            self.assertTrue(all('id' in item for item in items))
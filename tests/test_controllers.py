@@ -34,6 +34,34 @@ class TestRepos(unittest.TestCase):
         assert paciente3 is None
         print(paciente3)
 
+    def test_read_rows(self):
+        paciente = self.repo.create(
+            Paciente('maria', 'login-maria', 'password', date(1990, 2, 3), 'F')
+        )
+        row = self.repo.read_by_id(paciente.id)
+        assert row is not None
+        self.assertNotIsInstance(row, Paciente)
+        self.assertEqual(self.repo.to_dict(row), paciente.to_dict())
+        self.assertEqual(self.repo.to_dict(row)['data_nascimento'], '1990-02-03')
+
+        self.assertEqual(self.repo.read_by(login='login-maria')._id, paciente.id)  # type: ignore
+        self.assertIsNone(self.repo.read_by_id(999999))
+        self.repo.delete(paciente.id)
+
+    def test_iter_all_scope(self):
+        paciente = self.repo.create(
+            Paciente('joana', 'login-joana', 'password', date(1991, 2, 3), 'F')
+        )
+        rows = self.repo.iter_all(batch_size=1)
+        self.assertIn(paciente.id, [row._id for row in rows])
+        self.assertNotIn('yield_per', self.repo.db.connection().get_execution_options())
+
+        rows = self.repo.iter_all(batch_size=1)
+        next(rows)
+        rows.close()
+        self.assertIsNone(self.repo.read_by_id(999999))
+        self.repo.delete(paciente.id)
+
 
 class TestControllers(unittest.IsolatedAsyncioTestCase):
 
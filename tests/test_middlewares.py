@@ -0,0 +1,186 @@
+import asyncio
+import gzip
+import json
+import unittest
+import zlib
+from unittest.mock import patch
+
+from src import App
+from src.middlewares import CompressionMiddleware, ETagMiddleware, negotiate_encoding
+from src.models import StreamingResponse
+from src.routers._base import APIRouter
+from src.utils import check_etag, get, make_etag, make_response
+from tests.mock import TestClient
+
+
+ITENS = [{'id': i, 'nome': f'item {i}'} for i in range(200)]
+
+
+class ListaController:
+
+    url_prefix = '/lista/'
+    serializadas = 0
+
+    @get('/')
+    async def listar(self, request):
+        return make_response({'itens': ITENS})
+
+    @get('/pequena')
+    async def pequena(self, request):
+        return make_response({'ok': True})
+
+    @get('/versao')
+    async def versao(self, request):
+        response = check_etag(request, 7)
+        if response is not None:
+            return response
+        type(self).serializadas += 1
+        return make_response({'versao': 7}, {'etag': make_etag(7)})
+
+    @get('/stream')
+    async def stream(self, request):
+        return StreamingResponse(200, (json.dumps(item) + '\n' for item in ITENS))
+
+
+def make_app(middleware, params=None):
+    app = App(mode='test', routers=[APIRouter(ListaController())])
+    return app.add_middleware(middleware, params)
+
+
+async def asgi_request(app, path, headers):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': headers,
+    }
+    await app(scope, receive, send)
+
+    start = messages[0]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], dict(start['headers']), body, messages
+
+
+class Test_1_Compression(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app(CompressionMiddleware, {'minimum_size': 100})
+        cls.client = TestClient(cls.app)
+
+    def test_1_negotiation(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEqual(negotiate_encoding('gzip;q=0'), None)
+        self.assertEqual(negotiate_encoding('*'), 'gzip')
+        self.assertEqual(negotiate_encoding(''), None)
+
+    async def test_2_rsgi_gzip(self):
+        response = await self.client.get(path='/lista/', headers={'accept-encoding': 'gzip'})
+        self.assertEqual(response.headers['content-encoding'], 'gzip')
+        self.assertEqual(response.headers['vary'], 'accept-encoding')
+        self.assertEqual(int(response.headers['content-length']), len(response.body))
+        self.assertEqual(json.loads(gzip.decompress(response.body)), {'itens': ITENS})
+
+    async def test_3_threshold_and_identity(self):
+        response = await self.client.get(path='/lista/pequena', headers={'accept-encoding': 'gzip'})
+        self.assertNotIn('content-encoding', response.headers)
+        self.assertEqual(json.loads(response.body), {'ok': True})
+
+        response = await self.client.get(path='/lista/', headers={})
+        self.assertNotIn('content-encoding', response.headers)
+
+    async def test_4_rsgi_stream(self):
+        response = await self.client.get(path='/lista/stream', headers={'accept-encoding': 'deflate'})
+        self.assertEqual(response.headers['content-encoding'], 'deflate')
+        lines = zlib.decompress(response.body)
+        self.assertEqual([json.loads(line) for line in lines.splitlines()], ITENS)
+
+    async def test_5_asgi(self):
+        status, headers, body, _ = await asgi_request(
+            self.app, '/lista/', [(b'accept-encoding', b'gzip')]
+        )
+        self.assertEqual(headers[b'content-encoding'], b'gzip')
+        self.assertEqual(int(headers[b'content-length']), len(body))
+        self.assertEqual(json.loads(gzip.decompress(body)), {'itens': ITENS})
+
+        status, headers, body, messages = await asgi_request(
+            self.app, '/lista/stream', [(b'accept-encoding', b'gzip')]
+        )
+        self.assertNotIn(b'content-length', headers)
+        self.assertFalse(messages[-1]['more_body'])
+        lines = gzip.decompress(body).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], ITENS)
+
+    async def test_6_offload_large_bodies(self):
+        app = make_app(CompressionMiddleware, {'minimum_size': 100, 'offload_size': 1000})
+        loop = asyncio.get_running_loop()
+        with patch.object(loop, 'run_in_executor', wraps=loop.run_in_executor) as executor:
+            response = await TestClient(app).get(path='/lista/', headers={'accept-encoding': 'gzip'})
+
+        self.assertTrue(executor.called)
+        self.assertEqual(json.loads(gzip.decompress(response.body)), {'itens': ITENS})
+
+
+class Test_2_ETag(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = make_app(ETagMiddleware)
+        cls.client = TestClient(cls.app)
+
+    async def test_1_hash_and_304(self):
+        first = await self.client.get(path='/lista/')
+        etag = first.headers['etag']
+        self.assertEqual(json.loads(first.body), {'itens': ITENS})
+
+        second = await self.client.get(path='/lista/', headers={'if-none-match': etag})
+        self.assertEqual(second.status, 304)
+        self.assertEqual(second.body, '')
+        self.assertEqual(second.headers, {'etag': etag})
+
+        other = await self.client.get(path='/lista/', headers={'if-none-match': '"outro"'})
+        self.assertEqual(other.status, 200)
+
+    async def test_2_handler_short_circuit(self):
+        before = ListaController.serializadas
+        first = await self.client.get(path='/lista/versao')
+        self.assertEqual(first.headers['etag'], '"7"')
+
+        second = await self.client.get(path='/lista/versao', headers={'if-none-match': 'W/"7"'})
+        self.assertEqual(second.status, 304)
+        self.assertEqual(ListaController.serializadas, before + 1)
+
+    async def test_3_asgi(self):
+        status, headers, body, _ = await asgi_request(self.app, '/lista/', [])
+        etag = headers[b'etag']
+
+        status, headers, body, _ = await asgi_request(
+            self.app, '/lista/', [(b'if-none-match', etag)]
+        )
+        self.assertEqual((status, body), (304, b''))
+        self.assertNotIn(b'content-length', headers)
+
+    async def test_4_with_compression(self):
+        app = make_app(CompressionMiddleware, {'minimum_size': 100}).add_middleware(ETagMiddleware)
+        client = TestClient(app)
+        gzip_headers = {'accept-encoding': 'gzip'}
+
+        compressed = await client.get(path='/lista/', headers=gzip_headers)
+        plain = await client.get(path='/lista/')
+        self.assertNotEqual(compressed.headers['etag'], plain.headers['etag'])
+
+        versao = await client.get(path='/lista/versao', headers=gzip_headers)
+        response = await client.get(
+            path='/lista/versao', headers=dict(gzip_headers, **{'if-none-match': versao.headers['etag']})
+        )
+        self.assertEqual(response.status, 304)
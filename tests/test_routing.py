@@ -0,0 +1,444 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src import App
+
+from src.exceptions.http import MethodNotAllowedError, NotFoundError
+from src.models import Request
+from src.routers._base import APIRouter, RawRouter
+from src.routers._cache import RouteCache
+from src.routers._table import RouteTable
+from src.utils import Route, get, post, put, make_response
+
+
+class RoutingController:
+
+    url_prefix = '/itens/'
+
+    @get('/')
+    async def listar(self, request: Request):
+        return make_response({'itens': []})
+
+    @get('/<id:int>')
+    async def obter(self, request: Request, id: int):
+        return make_response({'id': id})
+
+    @put('/<id:int>')
+    async def atualizar(self, request: Request, id: int):
+        return make_response({'id': id})
+
+    @get('/novo')
+    async def novo(self, request: Request):
+        return make_response({'novo': True})
+
+    @get('/<nome:str>')
+    async def por_nome(self, request: Request, nome: str):
+        return make_response({'nome': nome})
+
+    @post('/<nome:str>')
+    async def criar_por_nome(self, request: Request, nome: str):
+        return make_response({'nome': nome}, 201)
+
+    @get('/<ids:list[int]>/lote/<preco:float>')
+    async def lote(self, request: Request, ids: list, preco: float):
+        return make_response({'ids': ids, 'preco': preco})
+
+    @post('/arquivo-<id:int>.pdf')
+    async def arquivo(self, request: Request, id: int):
+        return make_response({'id': id})
+
+
+class OrderController:
+
+    url_prefix = '/p/'
+
+    # dir() registra em ordem alfabética: a_, b_, c_
+    @get('/<n:str>/<id:int>')
+    async def a_aninhada(self, request: Request, n: str, id: int):
+        return make_response({'n': n, 'id': id})
+
+    @get('/<id:int>')
+    async def b_por_id(self, request: Request, id: int):
+        return make_response({'id': id})
+
+    @get('/<nome:str>')
+    async def c_por_nome(self, request: Request, nome: str):
+        return make_response({'nome': nome})
+
+
+class MatcherTests:
+
+    engine = 'trie'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.controller = RoutingController()
+        cls.router = APIRouter(cls.controller)
+        cls.router.use_engine(cls.engine)
+
+    def test_1_static(self):
+        handler, args = self.router.match_route('GET', '/itens/')
+        self.assertEqual(handler, self.controller.listar)
+        self.assertEqual(args, {})
+
+    def test_2_typed_edge(self):
+        handler, args = self.router.match_route('GET', '/itens/10')
+        self.assertEqual(handler, self.controller.obter)
+        self.assertEqual(args, {'id': 10})
+
+    def test_3_static_before_placeholder(self):
+        handler, _ = self.router.match_route('GET', '/itens/novo')
+        self.assertEqual(handler, self.controller.novo)
+
+        handler, args = self.router.match_route('GET', '/itens/antonio')
+        self.assertEqual(handler, self.controller.por_nome)
+        self.assertEqual(args, {'nome': 'antonio'})
+
+    def test_4_nested_typed_edges(self):
+        handler, args = self.router.match_route('GET', '/itens/1,2,3/lote/2.5')
+        self.assertEqual(handler, self.controller.lote)
+        self.assertEqual(args, {'ids': [1, 2, 3], 'preco': 2.5})
+
+    def test_5_mixed_segment(self):
+        handler, args = self.router.match_route('POST', '/itens/arquivo-7.pdf')
+        self.assertEqual(handler, self.controller.arquivo)
+        self.assertEqual(args, {'id': 7})
+
+    def test_6_not_found(self):
+        self.assertEqual(self.router.match_route('GET', '/outros/1'), (None, None))
+        self.assertEqual(self.router.match_route('GET', '/itens/1/2'), (None, None))
+
+    def test_7_method_not_allowed(self):
+        with self.assertRaises(MethodNotAllowedError):
+            self.router.match_route('DELETE', '/itens/1')
+
+    def test_7_method_not_allowed_headers(self):
+        with self.assertRaises(MethodNotAllowedError) as context:
+            self.router.match_route('DELETE', '/itens/novo')
+        self.assertEqual(
+            context.exception.json()['headers']['Allow'],
+            'GET, OPTIONS, POST'
+        )
+
+    def test_8_options(self):
+        handler, args = self.router.match_route('OPTIONS', '/itens/1')
+        self.assertIsNotNone(handler)
+        self.assertEqual(args, {})
+
+        response = asyncio.run(handler())
+        self.assertEqual(response.status, 204)
+        self.assertEqual(response.headers['Allow'], 'GET, OPTIONS, POST, PUT')
+
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        again, _ = self.router.match_route('OPTIONS', '/itens/2')
+        fresh = asyncio.run(again())
+        self.assertIsNot(fresh, response)
+        self.assertNotIn('Access-Control-Allow-Origin', fresh.headers)
+        self.assertEqual(fresh.headers['Allow'], 'GET, OPTIONS, POST, PUT')
+        self.assertEqual(
+            self.router.match_route('OPTIONS', '/outros/'),
+            (None, None)
+        )
+
+    def test_9_fallback_to_later_template(self):
+        handler, args = self.router.match_route('POST', '/itens/5')
+        self.assertEqual(handler, self.controller.criar_por_nome)
+        self.assertEqual(args, {'nome': '5'})
+
+    def test_10_registration_order_between_placeholders(self):
+        controller = OrderController()
+        router = APIRouter(controller)
+        router.use_engine(self.engine)
+
+        handler, args = router.match_route('GET', '/p/1')
+        self.assertEqual(handler, controller.b_por_id)
+        self.assertEqual(args, {'id': 1})
+
+        handler, args = router.match_route('GET', '/p/ana')
+        self.assertEqual(handler, controller.c_por_nome)
+
+
+class Test_1_TrieMatcher(MatcherTests, unittest.TestCase):
+    engine = 'trie'
+
+
+class Test_1_RegexMatcher(MatcherTests, unittest.TestCase):
+    engine = 'regex'
+
+
+class Test_1_LinearMatcher(MatcherTests, unittest.TestCase):
+    engine = 'linear'
+
+    def test_10_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            APIRouter(RoutingController()).use_engine('btree')
+
+
+class Test_2_StaticRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = RoutingController()
+        self.router = APIRouter(self.controller)
+
+    def test_1_static_table(self):
+        self.assertIn(('GET', '/itens/'), self.router.static_routes.routes)
+        self.assertIn(('GET', '/itens/novo'), self.router.static_routes.routes)
+        self.assertNotIn(('GET', '/itens/<id:int>'), self.router.static_routes.routes)
+
+    def test_2_hit_and_miss_counters(self):
+        self.router.match_route('GET', '/itens/')
+        self.router.match_route('GET', '/itens/novo')
+        self.router.match_route('GET', '/itens/1')
+        self.assertEqual(
+            self.router.static_routes.stats(),
+            {'routes': 2, 'hits': 2, 'misses': 1}
+        )
+
+
+class Test_3_ConverterPlan(unittest.TestCase):
+
+    def test_1_converters_compiled_once(self):
+        async def handler(request, ids: list, nome: str, filtros: dict):
+            ...
+
+        route = Route('/x/<ids:list[int]>/<nome:str>/<filtros:dict>', handler)
+        self.assertEqual(
+            route.match('/x/1,2/antonio/a=1,b=2'),
+            {'ids': [1, 2], 'nome': 'antonio', 'filtros': {'a': '1', 'b': '2'}}
+        )
+
+    def test_2_annotation_folded_into_plan(self):
+        async def handler(request, id: str):
+            ...
+
+        route = Route('/x/<id:int>', handler)
+        self.assertEqual(route.match('/x/007'), {'id': '7'})
+
+    def test_3_unknown_type(self):
+        with self.assertRaises(ValueError):
+            Route('/x/<id:uuid>', lambda request, id: None)
+
+
+class Test_4_RouteCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = App(mode='test', route_cache_size=2)
+
+    def setUp(self):
+        self.app.route_cache = RouteCache(2)
+
+    def test_1_repeated_path_skips_matching(self):
+        handler, args = self.app.resolve_route('GET', '/teste/1/')
+        self.assertEqual(args, {'id': 1})
+
+        with patch.object(self.app, 'match_routers', side_effect=AssertionError):
+            cached_handler, cached_args = self.app.resolve_route('GET', '/teste/1/')
+
+        self.assertEqual(cached_handler, handler)
+        self.assertEqual(cached_args, {'id': 1})
+        self.assertEqual(self.app.route_cache_stats()['hits'], 1)
+
+    def test_2_negative_results(self):
+        for _ in range(2):
+            with self.assertRaises(NotFoundError):
+                self.app.resolve_route('GET', '/inexistente/1')
+        for _ in range(2):
+            with self.assertRaises(MethodNotAllowedError):
+                self.app.resolve_route('DELETE', '/teste/1/')
+
+        stats = self.app.route_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_3_eviction(self):
+        self.app.resolve_route('GET', '/teste/1/')
+        self.app.resolve_route('GET', '/teste/2/')
+        self.app.resolve_route('GET', '/teste/1/')
+        self.app.resolve_route('GET', '/teste/3/')
+
+        self.assertEqual(
+            list(self.app.route_cache.entries),
+            [('GET', '/teste/1/'), ('GET', '/teste/3/')]
+        )
+        self.assertEqual(self.app.route_cache_stats()['evictions'], 1)
+
+    def test_4_static_routes_bypass_cache(self):
+        self.app.resolve_route('GET', '/teste/')
+        self.assertEqual(self.app.route_cache_stats()['size'], 0)
+
+    def test_5_hits_do_not_share_state(self):
+        app = App(mode='test', routers=[APIRouter(RoutingController())], route_cache_size=10)
+        for _ in range(3):
+            _, args = app.resolve_route('GET', '/itens/1,2,3/lote/2.5')
+            self.assertEqual(args['ids'], [1, 2, 3])
+            args['ids'].append(99)
+
+        errors = []
+        for _ in range(2):
+            with self.assertRaises(NotFoundError) as context:
+                app.resolve_route('GET', '/inexistente/1')
+            errors.append(context.exception)
+        self.assertIsNot(errors[0], errors[1])
+        self.assertIsNone(errors[1].__context__)
+
+    def test_6_volatile_mount_not_cached(self):
+        class Volatile:
+            cacheable = False
+            versions = iter(range(10))
+
+            def resolve_route(self, method, path):
+                return Volatile.resolve_route, {'version': next(self.versions)}
+
+        app = App(mode='test', routers=[APIRouter(RoutingController())], route_cache_size=10)
+        app.mount('/volatil', Volatile())
+
+        versions = [app.resolve_route('GET', '/volatil/a')[1]['version'] for _ in range(2)]
+        self.assertEqual(versions, [0, 1])
+        self.assertFalse(app.cacheable)
+        app.resolve_route('GET', '/itens/1')
+        self.assertEqual(list(app.route_cache.entries), [('GET', '/itens/1')])
+
+
+
+class ConflictController:
+
+    url_prefix = '/conflito/'
+
+    @get('/<nome:str>')
+    async def a_por_nome(self, request: Request, nome: str):
+        return make_response({'nome': nome})
+
+    @get('/<id:int>')
+    async def b_por_id(self, request: Request, id: int):
+        return make_response({'id': id})
+
+    @get('/<pk:int>')
+    async def c_por_pk(self, request: Request, pk: int):
+        return make_response({'pk': pk})
+
+    @get('/novo')
+    async def d_novo(self, request: Request):
+        return make_response({'novo': True})
+
+
+class Test_5_RouteTable(unittest.TestCase):
+
+    def test_1_conflicts_and_shadowed(self):
+        table = RouteTable.build([APIRouter(ConflictController())])
+
+        self.assertEqual(len(table), 4)
+        self.assertEqual(
+            [(a.endpoint, b.endpoint) for a, b in table.conflicts],
+            [('b_por_id', 'c_por_pk')]
+        )
+        self.assertEqual(
+            [(a.endpoint, b.endpoint) for a, b in table.shadowed],
+            [('a_por_nome', 'b_por_id')]
+        )
+
+    def test_2_app_routes(self):
+        app = App(mode='test')
+        entries = app.routes.find(method='GET', path='/teste/<id:int>/')
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].endpoint, 'teste_endpoint_2')
+        self.assertEqual(entries[0].router, 'TesteRouter')
+        self.assertEqual(app.routes.conflicts, ())
+
+    def test_3_dump_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'routes.json')
+            first = App(mode='test', route_table=file_path)
+            self.assertTrue(os.path.exists(file_path))
+
+            loaded = RouteTable.load(file_path)
+            self.assertEqual(loaded.entries, first.routes.entries)
+
+            with patch.object(
+                RouteTable, 'endpoints_for', wraps=loaded.endpoints_for
+            ) as endpoints_for:
+                second = App(mode='test', route_table=file_path)
+
+            self.assertTrue(endpoints_for.called)
+            self.assertEqual(second.routes.entries, first.routes.entries)
+
+    def test_3_stale_file_rewritten(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'routes.json')
+            first = App(mode='test', route_table=file_path)
+
+            # arquivo de uma versão antiga do TesteController, sem um endpoint
+            stale = RouteTable.load(file_path)
+            stale.entries = tuple(e for e in stale.entries if e.endpoint != 'teste_endpoint_2')
+            stale.sources['TesteController'] = ['teste.py', 0, 0]
+            stale.dump(file_path)
+
+            second = App(mode='test', route_table=file_path)
+            self.assertEqual(second.routes.entries, first.routes.entries)
+            self.assertEqual(RouteTable.load(file_path).to_dict(), first.routes.to_dict())
+
+            with open(file_path, 'w') as f:
+                f.write('{"version": 1, "routes": []}')
+            third = App(mode='test', route_table=file_path)
+            self.assertEqual(third.routes.entries, first.routes.entries)
+            self.assertEqual(RouteTable.load(file_path).to_dict(), first.routes.to_dict())
+
+    def test_3_router_receives_table(self):
+        table = RouteTable.build([APIRouter(RoutingController())])
+        with patch.object(RouteTable, 'endpoints_for', wraps=table.endpoints_for) as endpoints_for:
+            router = APIRouter(RoutingController(), table)
+
+        self.assertTrue(endpoints_for.called)
+        self.assertEqual(len(router.routes), len(table))
+
+    def test_4_function_handlers(self):
+        async def livre(request, id: int):
+            return make_response({'id': id})
+
+        router = RawRouter()
+        router.add_route('GET', '/livre/<id:int>', livre)
+        app = App(mode='test', routers=[router])
+
+        entry, = app.routes.find(path='/livre/<id:int>')
+        self.assertEqual(entry.controller, __name__)
+        self.assertTrue(entry.endpoint.endswith('livre'))
+
+
+class Test_6_MountTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.itens = APIRouter(RoutingController())
+        cls.conflito = APIRouter(ConflictController())
+        cls.app = App(mode='test', routers=[cls.itens, cls.conflito])
+
+    def test_1_only_owning_router_searched(self):
+        self.assertEqual(
+            self.app.mount_table.candidates('/conflito/1'), (self.conflito,)
+        )
+        self.assertEqual(self.app.mount_table.candidates('/outro/1'), ())
+
+        with patch.object(self.itens, 'match_dynamic', side_effect=AssertionError):
+            handler, args = self.app.resolve_route('GET', '/conflito/1')
+
+        self.assertEqual(args, {'nome': '1'})
+
+    def test_2_nested_mount(self):
+        app = App(mode='test', routers=[APIRouter(ConflictController())])
+        mount = app.mount('/api/v2', App(mode='test', routers=[APIRouter(RoutingController())]))
+
+        self.assertEqual(app.mount_table.candidates('/api/v2/itens/7'), (mount,))
+
+        handler, args = app.resolve_route('GET', '/api/v2/itens/7')
+        self.assertEqual(handler.__name__, 'obter')
+        self.assertEqual(args, {'id': 7})
+
+        handler, args = app.resolve_route('GET', '/api/v2/itens/')
+        self.assertEqual(handler.__name__, 'listar')
+
+        with self.assertRaises(MethodNotAllowedError):
+            app.resolve_route('DELETE', '/api/v2/itens/7')
+        with self.assertRaises(NotFoundError):
+            app.resolve_route('GET', '/api/v20/itens/7')